@@ -4,107 +4,346 @@ AI Analysis Test for Triangle Meeting Transcripts - Fixed Version
 Extract structured development intelligence from meeting transcripts
 """
 
+import asyncio
+import atexit
+import httpx
+import logging
+import logging.handlers
 import openai
+import orjson
 import os
-import json
+import queue
+import re
+import sys
+import tiktoken
+import uuid
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from app.services import analysis_store, llm_cache
+
+# JSON mode (response_format) needs a GPT-4 model that supports it; the original gpt-4 does not
+ANALYSIS_MODEL = "gpt-4o"
+
+# Transcripts over CHUNK_TOKENS are extracted per chunk with CHUNK_MODEL, then merged by ANALYSIS_MODEL
+CHUNK_TOKENS = 8000
+CHUNK_MODEL = "gpt-4o-mini"
+
+# Forces the model to emit a single parseable JSON object
+_JSON_RESPONSE = {"type": "json_object"}
+
+class _ConsoleHandler(logging.StreamHandler):
+    """StreamHandler that ends a record with extra={"end": ...} instead of a newline, like logger.info(end=...)"""
+    def emit(self, record):
+        self.terminator = getattr(record, "end", "\n")
+        super().emit(record)
+
+# Log records are queued and written by a listener thread, so callers never block on stdout.
+# All console output (status, progress and results) goes through this logger, so it stays in order.
+logger = logging.getLogger("analyze")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, _ConsoleHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# One sync client per process so the HTTP connection pool (and its TLS sessions) is reused
+_client = None
+
+def _get_client(api_key: str):
+    """Return the shared OpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(
+            api_key=api_key,
+            http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+        )
+    return _client
+
+def _make_async_client(api_key: str):
+    """
+    Build the AsyncOpenAI client for one batch run; use it with `async with`, since
+    its connection pool is bound to the event loop that first uses it
+    """
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+    )
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Tokenizer used to budget transcript chunks; matches the models the requests go to"""
+    return tiktoken.encoding_for_model(ANALYSIS_MODEL)
 
 def analyze_transcript(transcript_file: str, meeting_info: dict):
     """
     Analyze meeting transcript to extract development intelligence
     """
-    print(f"🧠 Triangle Development Intelligence Analysis")
-    print(f"📄 Transcript: {transcript_file}")
-    print(f"🏛️ Meeting: {meeting_info['jurisdiction']} {meeting_info['type']}")
-    print("=" * 60)
+    logger.info("🧠 Triangle Development Intelligence Analysis")
+    logger.info("📄 Transcript: %s", transcript_file)
+    logger.info("🏛️ Meeting: %s %s", meeting_info['jurisdiction'], meeting_info['type'])
+    logger.info("=" * 60)
     
     # Read the transcript
     try:
         with open(transcript_file, 'r', encoding='utf-8') as f:
             transcript = f.read()
-        print(f"📝 Transcript loaded: {len(transcript)} characters")
+        logger.info("📝 Transcript loaded: %d characters", len(transcript))
     except FileNotFoundError:
-        print(f"❌ Transcript file not found: {transcript_file}")
+        logger.error("❌ Transcript file not found: %s", transcript_file)
         return None
     
     # Check API key
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
-        print("❌ Error: OPENAI_API_KEY not set")
+        logger.error("❌ Error: OPENAI_API_KEY not set")
         return None
     
-    client = openai.OpenAI(api_key=api_key)
+    client = _get_client(api_key)
     
-    print("🤖 Starting AI analysis with GPT-4...")
+    logger.info("🤖 Starting AI analysis with %s...", ANALYSIS_MODEL)
     
-    # Build analysis prompt
-    analysis_prompt = build_analysis_prompt(transcript, meeting_info)
+    received = 0
+    
+    def show_progress(delta: str):
+        nonlocal received
+        received += len(delta)
+        logger.info("\r📡 Receiving analysis... %d characters", received, extra={"end": ""})
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are an expert Triangle area development analyst who extracts key information from planning meetings for professional newsletters."
-                },
-                {
-                    "role": "user", 
-                    "content": analysis_prompt
-                }
-            ],
-            temperature=0.1  # Low temperature for consistent extraction
-        )
+        chunks = split_transcript(transcript)
+        if len(chunks) == 1:
+            request = build_analysis_request(transcript, meeting_info)
+        else:
+            logger.info("✂️ Long transcript: extracting from %d chunks with %s...", len(chunks), CHUNK_MODEL)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                partials = list(executor.map(
+                    lambda chunk_request: llm_cache.cached_chat(client, validate=orjson.loads, **chunk_request)["content"],
+                    build_chunk_requests(chunks, meeting_info)
+                ))
+            logger.info("🔗 Merging chunk extractions...")
+            request = build_merge_request(partials, meeting_info)
         
-        analysis_text = response.choices[0].message.content
-        print("✅ AI analysis completed!")
+        completion = llm_cache.cached_chat(client, on_delta=show_progress, validate=parse_analysis_text, **request)
         
-        # Try to parse as JSON, fall back to text if needed
-        try:
-            analysis_data = json.loads(analysis_text)
-            print("✅ Structured data extracted successfully!")
-        except json.JSONDecodeError:
-            print("⚠️ Received text analysis, attempting to structure...")
-            analysis_data = {"raw_analysis": analysis_text}
+        if completion["cached"]:
+            logger.info("♻️ Using cached analysis (no API call made)")
+        else:
+            logger.info("")  # End the progress line
+        logger.info("✅ AI analysis completed!")
+        
+        analysis_data = completion["parsed"]
         
         # Display results
         display_analysis_results(analysis_data, meeting_info)
         
-        # Save results
-        output_file = f"analysis_{meeting_info['jurisdiction'].lower()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "meeting_info": meeting_info,
-                "analysis": analysis_data,
-                "transcript_length": len(transcript),
-                "analyzed_at": datetime.now().isoformat()
-            }, f, indent=2)
-        
-        print(f"💾 Analysis saved to: {output_file}")
+        output_file = save_analysis_results(analysis_data, meeting_info, len(transcript))
+        logger.info("💾 Analysis saved to: %s", output_file)
         
         return analysis_data
         
     except Exception as e:
-        print(f"❌ AI analysis failed: {str(e)}")
+        logger.error("❌ AI analysis failed: %s", e)
         return None
 
-def build_analysis_prompt(transcript: str, meeting_info: dict) -> str:
+async def analyze_transcripts_batch(jobs: list, max_concurrency: int = 8):
     """
-    Build comprehensive analysis prompt for Triangle development intelligence
+    Analyze many (transcript_file, meeting_info) jobs concurrently
+
+    Requests overlap on one AsyncOpenAI client, opened and closed by this call so
+    a later batch on a new event loop never reuses its connections; the semaphore
+    keeps us under the account's tokens-per-minute limit. Returns one entry per job, in order:
+    the analysis dict, or the exception raised for that job.
     """
-    return f"""
-Analyze this {meeting_info.get('jurisdiction', 'Triangle')} planning meeting transcript and extract development intelligence for the Triangle Development Digest newsletter.
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error("❌ Error: OPENAI_API_KEY not set")
+        return None
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    logger.info("🤖 Starting batch analysis of %d transcripts with %s...", len(jobs), ANALYSIS_MODEL)
+    
+    async def _analyze_one(client, transcript_file: str, meeting_info: dict):
+        transcript = (await asyncio.to_thread(Path(transcript_file).read_bytes)).decode('utf-8')
+        
+        async def _complete(request: dict, validate=orjson.loads) -> dict:
+            async with semaphore:
+                return await llm_cache.acached_chat(client, validate=validate, **request)
+        
+        chunks = split_transcript(transcript)
+        if len(chunks) == 1:
+            request = build_analysis_request(transcript, meeting_info)
+        else:
+            partials = await asyncio.gather(*[_complete(r) for r in build_chunk_requests(chunks, meeting_info)])
+            request = build_merge_request([partial["content"] for partial in partials], meeting_info)
+        
+        analysis_data = (await _complete(request, validate=parse_analysis_text))["parsed"]
+        # Compression and the file write are blocking; keep them off the event loop
+        output_file = await asyncio.to_thread(save_analysis_results, analysis_data, meeting_info, len(transcript))
+        logger.info("💾 %s analysis saved to: %s", meeting_info['jurisdiction'], output_file)
+        return analysis_data
+    
+    async with _make_async_client(api_key) as client:
+        results = await asyncio.gather(
+            *[_analyze_one(client, transcript_file, meeting_info) for transcript_file, meeting_info in jobs],
+            return_exceptions=True
+        )
+    
+    for (transcript_file, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.error("❌ AI analysis failed for %s: %s", transcript_file, result)
+    
+    return results
 
-Meeting Details:
-- Jurisdiction: {meeting_info.get('jurisdiction', 'Unknown')}
-- Date: {meeting_info.get('date', 'Unknown')}
-- Type: {meeting_info.get('type', 'Planning Commission')}
+def build_analysis_request(transcript: str, meeting_info: dict) -> dict:
+    """
+    Build the chat completion request for a transcript analysis
+    """
+    system_prompt, analysis_prompt = build_analysis_prompt(meeting_info)
+    return {
+        "model": ANALYSIS_MODEL,
+        "messages": [
+            {
+                "role": "system", 
+                "content": system_prompt
+            },
+            {
+                "role": "user", 
+                "content": analysis_prompt
+            },
+            # Sent as its own message so the transcript is never copied into a merged prompt string
+            {
+                "role": "user",
+                "content": transcript
+            }
+        ],
+        "temperature": 0.1,  # Low temperature for consistent extraction
+        "response_format": _JSON_RESPONSE
+    }
+
+def split_transcript(transcript: str, max_tokens: int = CHUNK_TOKENS) -> list:
+    """
+    Split a transcript into chunks of at most max_tokens, preferring paragraph boundaries
+    """
+    encoding = _encoding()
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in transcript.split("\n\n"):
+        tokens = encoding.encode(paragraph)
+        if current and current_tokens + len(tokens) > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        if len(tokens) > max_tokens:
+            # Whisper output often has no paragraph breaks; fall back to fixed token windows
+            chunks.extend(encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens), max_tokens))
+            continue
+        current.append(paragraph)
+        current_tokens += len(tokens)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def build_chunk_requests(chunks: list, meeting_info: dict) -> list:
+    """
+    Build one cheap-model extraction request per transcript chunk
+    """
+    system_prompt, analysis_prompt = build_analysis_prompt(meeting_info)
+    return [
+        {
+            "model": CHUNK_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": analysis_prompt},
+                {"role": "user", "content": f"[Part {i} of {len(chunks)}]\n{chunk}"}
+            ],
+            "temperature": 0.1,
+            "response_format": _JSON_RESPONSE
+        }
+        for i, chunk in enumerate(chunks, 1)
+    ]
+
+def build_merge_request(partials: list, meeting_info: dict) -> dict:
+    """
+    Build the final request that merges per-chunk extractions into one analysis
+    """
+    merge_prompt = _MERGE_PROMPT_TEMPLATE.format_map(ChainMap(
+        {"area": meeting_info.get('jurisdiction', 'Triangle'), "count": len(partials)},
+        meeting_info,
+        _PROMPT_DEFAULTS
+    ))
+    return {
+        "model": ANALYSIS_MODEL,
+        "messages": [
+            # Same system prompt as the single-call path, so the schema prefix stays cacheable
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": merge_prompt},
+            {"role": "user", "content": "\n\n".join(f"--- Part {i} ---\n{partial}" for i, partial in enumerate(partials, 1))}
+        ],
+        "temperature": 0.1,
+        "response_format": _JSON_RESPONSE
+    }
+
+def parse_analysis_text(analysis_text: str) -> dict:
+    """
+    Parse the model output as a JSON object, raising ValueError if none can be recovered
+
+    Used as the llm_cache validator, so a reply that fails here is never cached.
+    """
+    try:
+        analysis_data = orjson.loads(analysis_text)
+        logger.info("✅ Structured data extracted successfully!")
+        return analysis_data
+    except orjson.JSONDecodeError:
+        logger.warning("⚠️ Received text analysis, attempting to structure...")
+    
+    # JSON mode should prevent this, but recover a fenced or prefaced object rather than lose it
+    match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
+    if match:
+        try:
+            analysis_data = orjson.loads(match.group(0))
+            logger.info("✅ Structured data recovered from surrounding text")
+            return analysis_data
+        except orjson.JSONDecodeError:
+            pass
+    
+    raise ValueError(f"Model reply is not a JSON object: {analysis_text[:200]!r}")
+
+def save_analysis_results(analysis_data: dict, meeting_info: dict, transcript_length: int) -> str:
+    """
+    Save analysis results to a timestamped, zstd-compressed JSON file and return its name
+
+    A short random suffix keeps batch jobs for one jurisdiction that finish in the
+    same second from overwriting each other.
+    """
+    analyzed_at = datetime.now()
+    output_file = f"analysis_{meeting_info['jurisdiction'].lower()}_{analyzed_at:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.json.zst"
+    analysis_store.save(output_file, {
+        "meeting_info": meeting_info,
+        "analysis": analysis_data,
+        "transcript_length": transcript_length,
+        "analyzed_at": analyzed_at
+    })
+    return output_file
+
+# Static instructions and schema; sent first so OpenAI's prompt caching can reuse them
+ANALYSIS_SYSTEM_PROMPT = """You are an expert Triangle area development analyst who extracts key information from planning meetings for professional newsletters.
+
+Analyze the planning meeting transcript provided by the user and extract development intelligence for the Triangle Development Digest newsletter.
 
 Extract and return JSON with these sections:
 
-{{
+{
     "projects": [
-        {{
+        {
             "name": "project_name or case_number",
             "address": "street_address or location", 
             "case_number": "zoning_case_number if mentioned",
@@ -121,90 +360,124 @@ Extract and return JSON with these sections:
             "staff_recommendation": "staff_position",
             "acreage": "land_size_if_mentioned",
             "previous_action": "history_from_previous_meetings"
-        }}
+        }
     ],
     "key_people": [
-        {{
+        {
             "name": "person_name",
             "role": "commissioner/staff/developer/citizen",
             "notable_positions": "key_statements_or_positions"
-        }}
+        }
     ],
     "newsletter_highlights": [
         "Most important takeaway for Triangle developers 1",
         "Most important takeaway for Triangle developers 2", 
         "Most important takeaway for Triangle developers 3"
     ]
-}}
+}
 
 Focus on actionable intelligence that Triangle development professionals need to know. Pay special attention to:
 - Specific project names, addresses, and case numbers
 - Vote outcomes and commissioner positions  
 - Timeline and next steps
 - Staff recommendations and their success rate
+"""
+
+# Per-meeting part of the prompt, filled with str.format_map
+_USER_PROMPT_TEMPLATE = """
+Analyze this {area} planning meeting transcript.
+
+Meeting Details:
+- Jurisdiction: {jurisdiction}
+- Date: {date}
+- Type: {type}
+
+The full transcript follows in the next message.
+"""
 
-Transcript:
-{transcript}
+# Final pass over chunked transcripts: only the small per-chunk extractions are sent
+_MERGE_PROMPT_TEMPLATE = """
+The {area} planning meeting transcript was too long for one request, so it was split into {count} consecutive parts and each part was extracted separately.
+
+Meeting Details:
+- Jurisdiction: {jurisdiction}
+- Date: {date}
+- Type: {type}
+
+Merge the partial extractions in the next message into a single JSON object using the schema above. Combine entries that refer to the same project or person, keep the most complete details, and choose the most important newsletter highlights for the meeting as a whole.
 """
 
+_PROMPT_DEFAULTS = {
+    "jurisdiction": "Unknown",
+    "date": "Unknown",
+    "type": "Planning Commission"
+}
+
+def build_analysis_prompt(meeting_info: dict) -> tuple:
+    """
+    Build comprehensive analysis prompt for Triangle development intelligence
+
+    Returns (system_prompt, user_prompt); only the user prompt varies per meeting.
+    The transcript itself is sent as a separate message by build_analysis_request.
+    """
+    user_prompt = _USER_PROMPT_TEMPLATE.format_map(ChainMap(
+        {"area": meeting_info.get('jurisdiction', 'Triangle')},
+        meeting_info,
+        _PROMPT_DEFAULTS
+    ))
+    return ANALYSIS_SYSTEM_PROMPT, user_prompt
+
 def display_analysis_results(analysis_data: dict, meeting_info: dict):
     """
     Display analysis results in a readable format
     """
-    print(f"\n📊 Analysis Results for {meeting_info['jurisdiction']}:")
-    print("=" * 60)
+    logger.info(f"\n📊 Analysis Results for {meeting_info['jurisdiction']}:")
+    logger.info("=" * 60)
     
     # Projects found
     projects = analysis_data.get("projects", [])
     if projects:
-        print(f"\n🏗️ Development Projects Found: {len(projects)}")
+        logger.info(f"\n🏗️ Development Projects Found: {len(projects)}")
         for i, project in enumerate(projects, 1):
-            print(f"\n  📍 Project {i}:")
-            print(f"    • Name: {project.get('name', 'Unknown')}")
-            print(f"    • Address: {project.get('address', 'TBD')}")
-            print(f"    • Case: {project.get('case_number', 'N/A')}")
-            print(f"    • Type: {project.get('project_type', 'Unknown')}")
-            print(f"    • Status: {project.get('current_status', 'Unknown')}")
+            logger.info(f"\n  📍 Project {i}:")
+            logger.info(f"    • Name: {project.get('name', 'Unknown')}")
+            logger.info(f"    • Address: {project.get('address', 'TBD')}")
+            logger.info(f"    • Case: {project.get('case_number', 'N/A')}")
+            logger.info(f"    • Type: {project.get('project_type', 'Unknown')}")
+            logger.info(f"    • Status: {project.get('current_status', 'Unknown')}")
             
             if project.get('vote_outcome'):
-                print(f"    • Vote: {project['vote_outcome']}")
+                logger.info(f"    • Vote: {project['vote_outcome']}")
                 if project.get('vote_details'):
-                    print(f"    • Details: {project['vote_details']}")
+                    logger.info(f"    • Details: {project['vote_details']}")
             
             if project.get('developer'):
-                print(f"    • Developer: {project['developer']}")
+                logger.info(f"    • Developer: {project['developer']}")
             
             if project.get('acreage'):
-                print(f"    • Size: {project['acreage']}")
+                logger.info(f"    • Size: {project['acreage']}")
             
             if project.get('timeline'):
-                print(f"    • Next Steps: {project['timeline']}")
+                logger.info(f"    • Next Steps: {project['timeline']}")
             
             if project.get('previous_action'):
-                print(f"    • History: {project['previous_action']}")
+                logger.info(f"    • History: {project['previous_action']}")
     
     # Key People
     people = analysis_data.get("key_people", [])
     if people:
-        print(f"\n👥 Key People Mentioned: {len(people)}")
+        logger.info(f"\n👥 Key People Mentioned: {len(people)}")
         for person in people:
-            print(f"    • {person.get('name', 'Unknown')} ({person.get('role', 'Unknown role')})")
+            logger.info(f"    • {person.get('name', 'Unknown')} ({person.get('role', 'Unknown role')})")
     
     # Newsletter Highlights
     highlights = analysis_data.get("newsletter_highlights", [])
     if highlights:
-        print(f"\n💡 Newsletter Highlights:")
+        logger.info(f"\n💡 Newsletter Highlights:")
         for i, highlight in enumerate(highlights, 1):
-            print(f"    {i}. {highlight}")
-    
-    # Show raw analysis if structured parsing failed
-    if "raw_analysis" in analysis_data:
-        print(f"\n📄 Raw Analysis:")
-        print("-" * 40)
-        print(analysis_data["raw_analysis"][:1000] + "..." if len(analysis_data["raw_analysis"]) > 1000 else analysis_data["raw_analysis"])
-        print("-" * 40)
+            logger.info(f"    {i}. {highlight}")
     
-    print("\n" + "=" * 60)
+    logger.info("\n" + "=" * 60)
 
 def main():
     """
@@ -219,18 +492,18 @@ def main():
     
     transcript_file = "transcript_raleigh_middle_sample.txt"
     
-    print("🚀 PermitRDU AI Analysis Test")
-    print("Testing Triangle development intelligence extraction")
-    print()
+    logger.info("🚀 PermitRDU AI Analysis Test")
+    logger.info("Testing Triangle development intelligence extraction")
+    logger.info("")
     
     analysis_result = analyze_transcript(transcript_file, meeting_info)
     
     if analysis_result:
-        print("\n🎉 Analysis completed successfully!")
-        print("📈 Ready to generate newsletter content!")
-        print(f"💰 Estimated cost: ~$0.10-0.20 for analysis")
+        logger.info("\n🎉 Analysis completed successfully!")
+        logger.info("📈 Ready to generate newsletter content!")
+        logger.info(f"💰 Estimated cost: ~$0.10-0.20 for analysis")
     else:
-        print("\n❌ Analysis failed - check errors above")
+        logger.info("\n❌ Analysis failed - check errors above")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
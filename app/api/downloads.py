@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any
+from uuid import uuid4
+import asyncio
+import orjson
 import os
 from ..services.downloader import YouTubeDownloader
 
@@ -27,44 +31,103 @@ async def get_video_info(request: VideoInfoRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error getting video info: {str(e)}")
 
-@router.post("/download")
-async def download_video(request: DownloadRequest):
-    """Download video or audio"""
+# Download job state, keyed by job_id (in-memory; lost on restart)
+jobs: Dict[str, Dict[str, Any]] = {}
+
+async def _run_download(job_id: str, request: DownloadRequest):
+    """Run a yt-dlp download on the default thread pool so the event loop stays free"""
+    job = jobs[job_id]
+    job["status"] = "running"
     try:
         if request.format.lower() == "mp3":
-            result = downloader.download_audio(request.url, request.filename)
-        elif request.format.lower() == "mp4":
-            result = downloader.download_video(request.url, request.filename)
+            result = await asyncio.to_thread(downloader.download_audio, request.url, request.filename)
         else:
-            raise HTTPException(status_code=400, detail="Format must be 'mp3' or 'mp4'")
-        
-        return {
-            "success": True,
-            "message": "Download completed successfully",
-            "result": result
-        }
+            result = await asyncio.to_thread(downloader.download_video, request.url, request.filename)
+        job["status"] = "completed"
+        job["result"] = result
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Download failed: {str(e)}")
+        job["status"] = "failed"
+        job["error"] = f"Download failed: {str(e)}"
+
+@router.post("/download")
+async def download_video(request: DownloadRequest, background_tasks: BackgroundTasks):
+    """Queue a video or audio download and return a job id to poll"""
+    if request.format.lower() not in ("mp3", "mp4"):
+        raise HTTPException(status_code=400, detail="Format must be 'mp3' or 'mp4'")
+    
+    job_id = uuid4().hex
+    jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "url": request.url,
+        "format": request.format.lower(),
+        "result": None,
+        "error": None
+    }
+    background_tasks.add_task(_run_download, job_id, request)
+    
+    return {
+        "success": True,
+        "message": "Download queued",
+        "job_id": job_id,
+        "status": "queued"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_download_job(job_id: str):
+    """Get the status (and result, once finished) of a download job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+# Extensions (without the dot) listed by /files; set lookup instead of a suffix tuple walk
+_MEDIA_EXTS = frozenset({'mp3', 'mp4', 'm4a', 'webm'})
+
+def _iter_media_files(downloads_dir: str):
+    """Yield one listing entry per media file from a single scandir pass"""
+    with os.scandir(downloads_dir) as entries:
+        for entry in entries:
+            _, dot, ext = entry.name.rpartition('.')
+            if dot and ext in _MEDIA_EXTS and entry.is_file():
+                file_size = entry.stat().st_size
+                yield {
+                    "filename": entry.name,
+                    "size": file_size,
+                    "size_mb": round(file_size / 1048576, 2)
+                }
+
+def _stream_json(files):
+    """Encode entries as {"files": [...]} one element at a time"""
+    yield b'{"files":['
+    first = True
+    for file_info in files:
+        if not first:
+            yield b','
+        first = False
+        yield orjson.dumps(file_info)
+    yield b']}'
+
+def _stream_ndjson(files):
+    """Encode entries as newline-delimited JSON, one object per line"""
+    for file_info in files:
+        yield orjson.dumps(file_info) + b'\n'
 
 @router.get("/files")
-async def list_downloaded_files():
-    """List all downloaded files"""
+async def list_downloaded_files(format: str = "json"):
+    """List all downloaded files, streamed as they are read (?format=ndjson for one object per line)"""
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format must be 'json' or 'ndjson'")
+    
     try:
         downloads_dir = "downloads"
         if not os.path.exists(downloads_dir):
-            return {"files": []}
-        
-        files = []
-        for filename in os.listdir(downloads_dir):
-            if filename.endswith(('.mp3', '.mp4')):
-                file_path = os.path.join(downloads_dir, filename)
-                file_size = os.path.getsize(file_path)
-                files.append({
-                    "filename": filename,
-                    "size": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2)
-                })
+            return {"files": []} if format == "json" else Response(media_type="application/x-ndjson")
         
-        return {"files": files}
+        # Sync generators are iterated in Starlette's threadpool, so scandir never blocks the event loop
+        files = _iter_media_files(downloads_dir)
+        if format == "ndjson":
+            return StreamingResponse(_stream_ndjson(files), media_type="application/x-ndjson")
+        return StreamingResponse(_stream_json(files), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing files: {str(e)}")
\ No newline at end of file
@@ -1,10 +1,25 @@
 # app/api/meetings.py
 
 from fastapi import APIRouter, HTTPException
-from datetime import datetime
+from datetime import datetime, timezone
+import time
 
 router = APIRouter()
 
+# (epoch second, ISO string) so /health formats the timestamp at most once per second
+_health_timestamp = (0, "")
+
+def _now_iso() -> str:
+    """UTC ISO-8601 timestamp at second resolution, cached for the current second"""
+    global _health_timestamp
+    second = int(time.time())
+    if _health_timestamp[0] != second:
+        _health_timestamp = (
+            second,
+            datetime.fromtimestamp(second, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+        )
+    return _health_timestamp[1]
+
 @router.get("/health")
 async def health_check():
     """
@@ -13,7 +28,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Triangle Meeting Analysis API",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "message": "Meetings API is ready for development"
     }
 
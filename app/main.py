@@ -1,9 +1,11 @@
 # app/main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
+import hashlib
 import os
 from pathlib import Path
 
@@ -26,6 +28,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Media under the static mounts is already compressed; gzipping it only burns CPU
+_UNCOMPRESSED_PREFIXES = ("/downloads/", "/meetings/")
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip JSON/HTML responses but pass static media straight through"""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(_UNCOMPRESSED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress responses over 1KB (analysis JSON, file listings, landing page)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include API routers
 app.include_router(downloads_router, prefix="/api/downloads", tags=["downloads"])
 app.include_router(meetings_router, prefix="/api/meetings", tags=["meetings"])
@@ -40,12 +56,8 @@ meetings_dir = Path("meetings")
 meetings_dir.mkdir(exist_ok=True)
 app.mount("/meetings", StaticFiles(directory="meetings"), name="meetings")
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """
-    Main landing page with API documentation and quick start guide
-    """
-    return """
+# Landing page is static: encode it and compute its ETag once at import time
+_LANDING_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -209,4 +221,17 @@ async def root():
         </footer>
     </body>
     </html>
-    """
\ No newline at end of file
+    """
+
+_LANDING_HTML_BYTES = _LANDING_HTML.encode("utf-8")
+_LANDING_ETAG = f'"{hashlib.md5(_LANDING_HTML_BYTES).hexdigest()}"'
+_LANDING_HEADERS = {"ETag": _LANDING_ETAG, "Cache-Control": "public, max-age=3600"}
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    """
+    Main landing page with API documentation and quick start guide
+    """
+    if request.headers.get("if-none-match") == _LANDING_ETAG:
+        return Response(status_code=304, headers=_LANDING_HEADERS)
+    return HTMLResponse(content=_LANDING_HTML_BYTES, headers=_LANDING_HEADERS)
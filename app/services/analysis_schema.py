@@ -0,0 +1,49 @@
+# app/services/analysis_schema.py
+
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+# Models mirror the JSON layout requested in ANALYSIS_SYSTEM_PROMPT. Every field is
+# optional so a sparse meeting still validates; numbers are accepted where text is
+# expected (e.g. vote_details: 5).
+class _Section(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+class Project(_Section):
+    name: Optional[str] = None
+    address: Optional[str] = None
+    developer: Optional[str] = None
+    applicant: Optional[str] = None
+    project_type: Optional[str] = None
+    current_status: Optional[str] = None
+    vote_outcome: Optional[str] = None
+    vote_details: Optional[str] = None
+    key_concerns: List[str] = []
+    conditions: List[str] = []
+    timeline: Optional[str] = None
+    opposition: Optional[str] = None
+    staff_recommendation: Optional[str] = None
+
+class RegulatoryChange(_Section):
+    topic: Optional[str] = None
+    description: Optional[str] = None
+    impact: Optional[str] = None
+    effective_date: Optional[str] = None
+
+class MarketTrend(_Section):
+    trend: Optional[str] = None
+    description: Optional[str] = None
+    implications: Optional[str] = None
+
+class KeyPerson(_Section):
+    name: Optional[str] = None
+    role: Optional[str] = None
+    notable_positions: Optional[str] = None
+
+class AnalysisOut(_Section):
+    projects: List[Project] = []
+    regulatory_changes: List[RegulatoryChange] = []
+    market_intelligence: List[MarketTrend] = []
+    key_people: List[KeyPerson] = []
+    newsletter_highlights: List[str] = []
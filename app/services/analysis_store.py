@@ -0,0 +1,75 @@
+# app/services/analysis_store.py
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Union
+
+import orjson
+import zstandard as zstd
+
+try:
+    import ijson
+except ImportError:  # Optional: load_fields falls back to a full parse
+    ijson = None
+
+# Level 3 is zstd's default speed/ratio trade-off
+_compressor = zstd.ZstdCompressor(level=3)
+_decompressor = zstd.ZstdDecompressor()
+
+def is_compressed(path: Union[str, Path]) -> bool:
+    """
+    True for .zst files written by save()
+    """
+    return str(path).endswith(".zst")
+
+def save(path: Union[str, Path], payload: Any) -> None:
+    """
+    Write payload as JSON; zstd-compressed when the path ends in .zst
+    """
+    if is_compressed(path):
+        data = _compressor.compress(orjson.dumps(payload))
+    else:
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    Path(path).write_bytes(data)
+
+def load(path: Union[str, Path]) -> Any:
+    """
+    Read a JSON file written by save(), plain or .zst
+    """
+    data = Path(path).read_bytes()
+    if is_compressed(path):
+        data = _decompressor.decompress(data)
+    return orjson.loads(data)
+
+def load_fields(path: Union[str, Path], *fields: str) -> Dict[str, Any]:
+    """
+    Read only the given dotted fields (e.g. "analysis.projects") into a nested dict
+
+    Streams with ijson when it is installed, so large values that aren't asked for
+    (like the transcript) are never built in memory; otherwise parses the whole file.
+    """
+    data = load(path) if ijson is None else None
+    result: Dict[str, Any] = {}
+    for field in fields:
+        if data is None:
+            with _open_stream(path) as stream:
+                value = next(ijson.items(stream, field, use_float=True), None)
+        else:
+            value = data
+            for key in field.split("."):
+                value = value.get(key) if isinstance(value, dict) else None
+        if value is None:
+            continue
+        
+        *parents, leaf = field.split(".")
+        target = result
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = value
+    return result
+
+def _open_stream(path: Union[str, Path]) -> BinaryIO:
+    """
+    Binary stream of the JSON text, decompressing .zst on the fly
+    """
+    raw = open(path, "rb")
+    return _decompressor.stream_reader(raw, closefd=True) if is_compressed(path) else raw
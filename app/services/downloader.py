@@ -1,18 +1,36 @@
 import os
+import subprocess
 import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from cachetools import TTLCache
+
+# Video metadata rarely changes; serve repeat lookups from memory for 15 minutes
+_info_cache = TTLCache(maxsize=1024, ttl=900)
+
+# Query parameters that don't change which video a URL points to
+_IGNORED_PARAMS = {'t', 'list', 'index', 'start', 'si', 'feature', 'pp'}
+
+def _normalize_url(url: str) -> str:
+    """Strip playback/playlist parameters so equivalent URLs share a cache key"""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if k not in _IGNORED_PARAMS])
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
 
 class YouTubeDownloader:
     def __init__(self, download_dir: str = "downloads"):
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
+        self._info_ydl = None
     
     def download_audio(self, url: str, filename: str = None):
-        """Download audio as MP3"""
+        """Download audio in its native m4a/opus container (Whisper accepts it as-is)"""
         ydl_opts = {
-            'format': 'bestaudio/best',
-            'extractaudio': True,
-            'audioformat': 'mp3',
+            'format': 'bestaudio[ext=m4a]/bestaudio',
+            'concurrent_fragment_downloads': 8,
+            'http_chunk_size': 10 * 1024 * 1024,
             'outtmpl': str(self.download_dir / '%(title)s.%(ext)s'),
             'noplaylist': True,
         }
@@ -20,18 +38,17 @@ class YouTubeDownloader:
         if filename:
             ydl_opts['outtmpl'] = str(self.download_dir / f'{filename}.%(ext)s')
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            return {
-                "title": info.get('title', 'Unknown'),
-                "duration": info.get('duration', 0),
-                "filename": info.get('_filename', 'unknown.mp3')
-            }
+        return self._download(url, ydl_opts, 'unknown.m4a')
     
     def download_video(self, url: str, filename: str = None):
         """Download video as MP4"""
+        # Separate DASH video+audio streams fetched in parallel fragments, merged into MP4 by ffmpeg;
+        # falls back to the best single file when no split streams exist
         ydl_opts = {
-            'format': 'best[ext=mp4]',
+            'format': 'bv*+ba/b',
+            'merge_output_format': 'mp4',
+            'concurrent_fragment_downloads': 8,
+            'http_chunk_size': 10 * 1024 * 1024,
             'outtmpl': str(self.download_dir / '%(title)s.%(ext)s'),
             'noplaylist': True,
         }
@@ -39,22 +56,54 @@ class YouTubeDownloader:
         if filename:
             ydl_opts['outtmpl'] = str(self.download_dir / f'{filename}.%(ext)s')
         
+        return self._download(url, ydl_opts, 'unknown.mp4')
+    
+    def transcode_to_mp3(self, file_paths: List[str], max_workers: int = 4) -> List[str]:
+        """Transcode downloaded audio to MP3 on request, one ffmpeg process per file"""
+        def _transcode(file_path: str) -> str:
+            output_path = str(Path(file_path).with_suffix('.mp3'))
+            subprocess.run(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-i', file_path, '-vn', '-c:a', 'libmp3lame', '-q:a', '4', output_path],
+                check=True
+            )
+            return output_path
+        
+        # Threads are enough here: each one just waits on its own ffmpeg process
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_transcode, file_paths))
+    
+    def _download(self, url: str, ydl_opts: dict, default_filename: str):
+        """Resolve the output filename first and skip yt-dlp's download if it already exists"""
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+            info = ydl.extract_info(url, download=False)
+            filename = ydl.prepare_filename(info)
+            if os.path.exists(filename):
+                info['_filename'] = filename
+            else:
+                info = ydl.process_ie_result(info, download=True)
             return {
                 "title": info.get('title', 'Unknown'),
                 "duration": info.get('duration', 0),
-                "filename": info.get('_filename', 'unknown.mp4')
+                "filename": info.get('_filename', default_filename)
             }
     
     def get_video_info(self, url: str):
         """Get video information without downloading"""
-        ydl_opts = {'quiet': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            return {
-                "title": info.get('title', 'Unknown'),
-                "duration": info.get('duration', 0),
-                "thumbnail": info.get('thumbnail', ''),
-                "uploader": info.get('uploader', 'Unknown')
-            }
\ No newline at end of file
+        cache_key = _normalize_url(url)
+        if cache_key in _info_cache:
+            return _info_cache[cache_key]
+        
+        # Metadata lookups share one YoutubeDL so extractor setup happens once
+        if self._info_ydl is None:
+            self._info_ydl = yt_dlp.YoutubeDL({'quiet': True})
+        
+        info = self._info_ydl.extract_info(url, download=False)
+        result = {
+            "title": info.get('title', 'Unknown'),
+            "duration": info.get('duration', 0),
+            "thumbnail": info.get('thumbnail', ''),
+            "uploader": info.get('uploader', 'Unknown')
+        }
+        
+        _info_cache[cache_key] = result
+        return result
\ No newline at end of file
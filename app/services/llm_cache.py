@@ -0,0 +1,180 @@
+# app/services/llm_cache.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable
+
+import orjson
+
+# Only replies the model finished are cached; "length" or "content_filter" means truncated.
+# A forced tool call ends with "stop"; "tool_calls" is the unforced equivalent.
+_COMPLETE_FINISH_REASONS = ("stop", "tool_calls")
+
+logger = logging.getLogger(__name__)
+
+def cache_dir() -> Optional[Path]:
+    """
+    Directory for cached LLM responses; set LLM_CACHE_DIR="" to disable caching
+    """
+    directory = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+    return Path(directory) if directory else None
+
+def make_key(**request: Any) -> str:
+    """
+    Content-addressed key for a chat completion request (model, messages, options)
+    """
+    return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def load(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached payload for a key, or None on a miss
+    """
+    directory = cache_dir()
+    if directory is None:
+        return None
+    try:
+        return orjson.loads((directory / f"{key}.json").read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+def store(key: str, payload: Dict[str, Any]) -> None:
+    """
+    Atomically write a payload so concurrent runs never see a partial file
+
+    Each write gets its own temp file, so concurrent writers of one key can't collide.
+    A failed write is logged, not raised: the reply was already paid for.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f"{key}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(orjson.dumps(payload))
+        os.replace(tmp.name, directory / f"{key}.json")
+    except OSError as e:
+        logger.warning("Could not write LLM cache entry %s: %s", key, e)
+
+def _message_text(message) -> Optional[str]:
+    """
+    Text of a message or stream delta: its content, else the first tool call's arguments
+    """
+    if message.content:
+        return message.content
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls and tool_calls[0].function:
+        return tool_calls[0].function.arguments
+    return message.content
+
+def cached_chat(client, on_delta: Optional[Callable[[str], None]] = None, validate: Optional[Callable[[str], Any]] = None, **request: Any) -> Dict[str, Any]:
+    """
+    Call client.chat.completions.create unless an identical request is cached
+
+    When on_delta is given the completion is streamed and each content delta is
+    passed to it as it arrives; the cache key is the same either way. With a forced
+    tool_choice the tool call's JSON arguments stand in for the content.
+
+    validate(content) parses the reply and its result is returned as "parsed". A reply
+    is stored only once it validates and the model finished it, so a truncated or
+    malformed reply is never replayed; if validate raises, the exception propagates.
+    A cached reply that no longer validates is treated as a miss.
+    """
+    key = make_key(**request)
+    cached = _validated(load(key), validate)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    if on_delta is None:
+        response = client.chat.completions.create(**request)
+        payload = _response_payload(response)
+    else:
+        payload = _stream_chat(client, on_delta, request)
+    return {**_store_if_complete(key, payload, validate), "cached": False}
+
+def _stream_chat(client, on_delta: Callable[[str], None], request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stream a chat completion, forwarding deltas and collecting the full text
+    """
+    parts = []
+    total_tokens = finish_reason = None
+    stream = client.chat.completions.create(**request, stream=True, stream_options={"include_usage": True})
+    for chunk in stream:
+        text = _message_text(chunk.choices[0].delta) if chunk.choices else None
+        if text:
+            parts.append(text)
+            on_delta(text)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+        if chunk.usage:
+            total_tokens = chunk.usage.total_tokens
+    return {"content": "".join(parts), "total_tokens": total_tokens, "finish_reason": finish_reason}
+
+async def acached_chat(client, on_delta: Optional[Callable[[str], None]] = None, validate: Optional[Callable[[str], Any]] = None, **request: Any) -> Dict[str, Any]:
+    """
+    Async variant of cached_chat for openai.AsyncOpenAI clients
+    """
+    key = make_key(**request)
+    cached = _validated(await asyncio.to_thread(load, key), validate)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    if on_delta is None:
+        response = await client.chat.completions.create(**request)
+        payload = _response_payload(response)
+    else:
+        payload = await _astream_chat(client, on_delta, request)
+    return {**await asyncio.to_thread(_store_if_complete, key, payload, validate), "cached": False}
+
+async def _astream_chat(client, on_delta: Callable[[str], None], request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async counterpart of _stream_chat
+    """
+    parts = []
+    total_tokens = finish_reason = None
+    stream = await client.chat.completions.create(**request, stream=True, stream_options={"include_usage": True})
+    async for chunk in stream:
+        text = _message_text(chunk.choices[0].delta) if chunk.choices else None
+        if text:
+            parts.append(text)
+            on_delta(text)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+        if chunk.usage:
+            total_tokens = chunk.usage.total_tokens
+    return {"content": "".join(parts), "total_tokens": total_tokens, "finish_reason": finish_reason}
+
+def _response_payload(response) -> Dict[str, Any]:
+    """
+    Cacheable fields of a non-streamed chat completion
+    """
+    return {
+        "content": _message_text(response.choices[0].message),
+        "total_tokens": response.usage.total_tokens if getattr(response, "usage", None) else None,
+        "finish_reason": response.choices[0].finish_reason
+    }
+
+def _validated(payload: Optional[Dict[str, Any]], validate: Optional[Callable[[str], Any]]) -> Optional[Dict[str, Any]]:
+    """
+    A cached payload with its "parsed" value, or None when it is missing or fails validate
+    """
+    if payload is None or validate is None:
+        return payload
+    try:
+        return {**payload, "parsed": validate(payload["content"])}
+    except Exception:
+        return None
+
+def _store_if_complete(key: str, payload: Dict[str, Any], validate: Optional[Callable[[str], Any]]) -> Dict[str, Any]:
+    """
+    Validate a fresh payload (raising if it is invalid) and store it if the model finished it
+    """
+    result = dict(payload)
+    if validate is not None:
+        result["parsed"] = validate(payload["content"])
+    if payload.get("finish_reason") in _COMPLETE_FINISH_REASONS:
+        store(key, payload)
+    return result
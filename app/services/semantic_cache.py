@@ -0,0 +1,79 @@
+# app/services/semantic_cache.py
+
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import orjson
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+SIMILARITY_THRESHOLD = 0.9
+_EMBED_CHARS = 24000  # About 6000 tokens: nearly a whole analysis window, within the model's 8191-token input
+
+# add() is a read-modify-write of one file; concurrent to_thread callers must take turns
+_write_lock = threading.Lock()
+
+def index_path() -> Optional[Path]:
+    """
+    JSON index of (embedding, analysis) pairs; set SEMANTIC_CACHE_PATH="" to disable
+    """
+    path = os.getenv("SEMANTIC_CACHE_PATH", ".cache/analysis_index.json")
+    return Path(path) if path else None
+
+async def embed(client, text: str) -> List[float]:
+    """
+    Unit-length embedding of the start of a transcript
+    """
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=text[:_EMBED_CHARS])
+    return _normalize(response.data[0].embedding)
+
+def lookup(embedding: List[float], threshold: float = SIMILARITY_THRESHOLD) -> Optional[Dict[str, Any]]:
+    """
+    Return the most similar cached entry ({"analysis", "similarity"}) at or above threshold
+    """
+    best, best_score = None, threshold
+    for entry in _load():
+        score = sum(a * b for a, b in zip(embedding, entry["embedding"]))
+        if score >= best_score:
+            best, best_score = entry, score
+    if best is None:
+        return None
+    return {"analysis": best["analysis"], "similarity": best_score}
+
+def add(embedding: List[float], analysis: Dict[str, Any]) -> None:
+    """
+    Append an entry, rewriting the index atomically
+    """
+    path = index_path()
+    if path is None:
+        return
+    with _write_lock:
+        entries = _load()
+        entries.append({"embedding": embedding, "analysis": analysis})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temp name, so other processes writing the index never share it
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(orjson.dumps(entries))
+        os.replace(tmp.name, path)
+
+def _load() -> List[Dict[str, Any]]:
+    """
+    All cached entries, or an empty list when the index is missing or disabled
+    """
+    path = index_path()
+    if path is None:
+        return []
+    try:
+        return orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return []
+
+def _normalize(vector: List[float]) -> List[float]:
+    """
+    Scale to unit length so a dot product is cosine similarity
+    """
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
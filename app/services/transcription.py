@@ -1,24 +1,130 @@
 # app/services/transcription.py
 
+import httpx
 import openai
 import os
 from pathlib import Path
-import aiofiles
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 import asyncio
-import json
+import hashlib
+import logging
+import math
+import mimetypes
+import re
+import shutil
+import tempfile
+import threading
 from datetime import datetime
+from functools import lru_cache
 
-class TranscriptionService:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
+import tiktoken
+
+from app.services import llm_cache, semantic_cache
+from app.services.analysis_schema import AnalysisOut
+
+logger = logging.getLogger(__name__)
+
+# Awaited with (chunk_index, chunk_result) as each transcript chunk completes
+ChunkCallback = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+# Whisper uploads of ~25MB can take minutes end to end; fail fast only on connect
+_UPLOAD_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+# Transcript budgets in tokens, leaving room for the prompt and the model's JSON reply
+_ANALYSIS_TRANSCRIPT_TOKENS = 7000
+_ENHANCE_TRANSCRIPT_TOKENS = 4000
+
+# Prompt templates are module constants, filled per call with str.format_map
+_ENHANCE_PROMPT_TEMPLATE = """Clean up this Triangle planning meeting transcript and organize it for analysis.
+
+Meeting Context:
+- Jurisdiction: {jurisdiction}
+- Date: {date}
+- Meeting Type: {type}
+
+Please:
+1. Fix obvious transcription errors
+2. Identify distinct speakers when possible (Chair, Commissioners, Staff, Public)
+3. Break into logical sections (Agenda items, Project discussions, Public comments)
+4. Preserve all project names, addresses, developer names, and vote outcomes
+
+Return JSON format:
+{{
+    "text": "cleaned_full_transcript",
+    "sections": [
+        {{
+            "title": "section_name",
+            "content": "section_content",
+            "speakers": ["list_of_speakers"],
+            "key_topics": ["project_names", "addresses"]
+        }}
+    ]
+}}
+
+Original Transcript:
+{transcript}"""
+
+_ANALYSIS_USER_TEMPLATE = """Analyze this {region} planning meeting transcript and extract development intelligence for a professional newsletter.
+
+Meeting Details:
+- Jurisdiction: {jurisdiction}
+- Date: {date}
+- Type: {type}
+
+Transcript:
+{transcript}"""
+
+# Sentence breaks used to pack the transcript into analysis windows
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+_SILENCE_END_RE = re.compile(r"silence_end: ([\d.]+) \| silence_duration: ([\d.]+)")
+
+# Shorten every pause over 1s to 0.5s: dead air is billed per minute and can trigger Whisper repetition loops
+_SILENCE_TRIM_FILTER = "silenceremove=stop_periods=-1:stop_duration=1:stop_silence=0.5:stop_threshold=-40dB"
+
+_shared_client: Optional[openai.AsyncOpenAI] = None
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Process-wide AsyncOpenAI client so every service reuses one keep-alive connection pool
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=20)
+            )
         )
+    return _shared_client
+
+class TranscriptionService:
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None, backend: str = "openai"):
+        self.client = client or get_openai_client()
+        self.backend = backend  # "openai" (Whisper API) or "faster-whisper" (local, batched)
+        self.local_model_size = "large-v3"
+        self.local_compute_type: Optional[str] = None  # None: int8_float16 on GPU, int8 on CPU
+        self.vad_min_silence_ms = 500  # Pauses at least this long are cut from local transcription
+        self.local_batch_size = 16
+        self._local_pipeline = None
+        self._local_pipeline_lock = threading.Lock()  # Concurrent files must not load the model twice
         self.max_file_size = 25 * 1024 * 1024  # 25MB limit for Whisper
+        self.chunk_target_size = 24 * 1024 * 1024  # Leave headroom under the limit when splitting
+        self.max_concurrent_uploads = 4  # Parallel Whisper requests per file (OpenAI rate limits)
+        self.max_chunk_seconds: Optional[float] = None  # Also split long audio by length so it uploads in parallel
+        self.compressed_cache_dir = Path(tempfile.gettempdir()) / "permitrdu_audio"
+        self.trim_silence = True  # Note: trimmed audio's timestamps no longer match the original recording
+        self.speedup_factor = 1.75  # Whisper handles sped-up speech well; billing and latency scale with audio length
+        self.min_audio_seconds = 30.0  # Shorter recordings can't be a meeting: rejected before any transcription
+        self.min_speech_seconds = 5.0  # Less audio than this left after silence trimming: treated as silent
     
-    async def transcribe_meeting(self, file_path: str, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    async def transcribe_meeting(self, file_path: str, meeting_info: Dict[str, Any], on_chunk: Optional[ChunkCallback] = None, processed_at: Optional[str] = None) -> Dict[str, Any]:
         """
         Transcribe meeting audio and prepare for analysis
+
+        on_chunk(index, chunk_result) is awaited as each chunk's transcript arrives
+        (once, with index 0, for files uploaded whole) so callers can start work early.
+        processed_at lets a pipeline stamp every stage with the same timestamp.
         """
         try:
             file_path = Path(file_path)
@@ -31,16 +137,63 @@ class TranscriptionService:
                     "transcript": None
                 }
             
-            # Check file size and handle large files
-            if file_path.stat().st_size > self.max_file_size:
-                return await self._handle_large_file(file_path, meeting_info)
+            # A cheap ffprobe turns away empty or truncated uploads before the expensive stages
+            try:
+                source_duration = await _probe_duration(file_path)
+            except Exception:
+                source_duration = None  # ffprobe unavailable or unreadable header: let transcription decide
+            if source_duration is not None and source_duration < self.min_audio_seconds:
+                return self._unusable_audio(f"{source_duration:.1f}s of audio (minimum {self.min_audio_seconds:g}s)")
+            
+            speedup = 1.0
+            backend_used = self.backend
+            local_error = None
+            transcript_result = None
+            if self.backend == "faster-whisper":
+                # Local inference has no upload limit or per-minute bill: no compression or chunking
+                local_result = await asyncio.to_thread(self._transcribe_local, file_path)
+                if local_result["success"]:
+                    transcript_result = local_result
+                    if on_chunk:
+                        await on_chunk(0, transcript_result)
+                else:
+                    # Fall back to the Whisper API, loudly: a broken local install would otherwise become silent API spend
+                    local_error = local_result.get("error")
+                    logger.warning("faster-whisper failed, falling back to the paid Whisper API: %s", local_error)
+                    backend_used = "openai"
             
-            # Transcribe the file
-            transcript_result = await self._transcribe_file(file_path)
+            if transcript_result is None:
+                # Speech-tuned Opus is ~6-10x smaller, so most meetings fit in one upload
+                try:
+                    file_path = await self._compress_audio(file_path)
+                    speedup = self.speedup_factor
+                    if self.trim_silence:
+                        # Pauses are cut to 0.5s, so a near-silent recording compresses to almost nothing
+                        audible = await _probe_duration(file_path) * speedup
+                        if audible < self.min_speech_seconds:
+                            return self._unusable_audio(f"only {audible:.1f}s of non-silent audio")
+                except Exception:
+                    pass  # ffmpeg unavailable or failed: upload the original file
+                
+                # Large (or, with max_chunk_seconds, long) files are split and transcribed in parallel chunks
+                too_long = self.max_chunk_seconds and (source_duration or 0) / speedup > self.max_chunk_seconds
+                if file_path.stat().st_size > self.max_file_size or too_long:
+                    transcript_result = await self._handle_large_file(file_path, on_chunk)
+                else:
+                    transcript_result = await self._transcribe_file(file_path)
+                    if on_chunk and transcript_result["success"]:
+                        await on_chunk(0, transcript_result)
             
             if not transcript_result["success"]:
                 return transcript_result
             
+            # Whisper heard sped-up audio: stretch times back to the meeting's own pace
+            billed_duration = transcript_result.get("duration") or 0
+            segments = [
+                {**segment, "start": segment["start"] * speedup, "end": segment["end"] * speedup}
+                for segment in map(_segment_dict, transcript_result.get("segments") or [])
+            ]
+            
             # Enhance transcript with meeting context
             enhanced_result = await self._enhance_transcript(
                 transcript_result["transcript"], 
@@ -51,11 +204,14 @@ class TranscriptionService:
                 "success": True,
                 "transcript": enhanced_result["text"],
                 "meeting_info": meeting_info,
-                "duration": transcript_result.get("duration"),
+                "duration": billed_duration * speedup,
+                "source_duration": source_duration,
                 "language": transcript_result.get("language"),
-                "segments": transcript_result.get("segments", []),
-                "cost_estimate": self._calculate_cost(transcript_result.get("duration", 0)),
-                "processed_at": datetime.now().isoformat(),
+                "segments": segments,
+                "cost_estimate": self._calculate_cost(billed_duration / 60) if backend_used == "openai" else 0.0,
+                "backend": backend_used,
+                "local_error": local_error,
+                "processed_at": processed_at or datetime.now().isoformat(),
                 "enhanced_sections": enhanced_result.get("sections", [])
             }
             
@@ -66,17 +222,56 @@ class TranscriptionService:
                 "transcript": None
             }
     
+    def _unusable_audio(self, reason: str) -> Dict[str, Any]:
+        """
+        Failure result for audio too short or too quiet to be worth transcribing
+        """
+        return {
+            "success": False,
+            "error": f"Audio too short or silent: {reason}",
+            "transcript": None
+        }
+    
+    async def _compress_audio(self, file_path: Path) -> Path:
+        """
+        Re-encode audio as 16kHz mono 24kbps Opus for upload, cached by source content hash
+
+        Silence trimming and speed-up are applied in the same ffmpeg pass.
+        """
+        digest = await asyncio.to_thread(file_sha256, file_path)
+        filters = [_SILENCE_TRIM_FILTER] if self.trim_silence else []
+        if self.speedup_factor != 1.0:
+            filters.append(f"atempo={self.speedup_factor}")
+        filter_args = ["-af", ",".join(filters)] if filters else []
+        variant = f"{'_trimmed' if self.trim_silence else ''}_x{self.speedup_factor}"
+        output_path = self.compressed_cache_dir / f"{digest}{variant}.ogg"
+        if output_path.exists():
+            return output_path
+        
+        self.compressed_cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix(f".{os.getpid()}.tmp.ogg")
+        await _run_command(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", str(file_path),
+            "-vn", *filter_args, "-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k", "-application", "voip",
+            str(tmp_path)
+        )
+        os.replace(tmp_path, output_path)
+        return output_path
+    
     async def _transcribe_file(self, file_path: Path) -> Dict[str, Any]:
         """
         Core transcription using OpenAI Whisper
         """
         try:
-            async with aiofiles.open(file_path, "rb") as audio_file:
+            # A (name, file, mime) tuple lets httpx stream the multipart body from disk instead of buffering it
+            mime_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+            with open(file_path, "rb") as audio_file:
                 transcript = await self.client.audio.transcriptions.create(
                     model="whisper-1",
-                    file=audio_file,
+                    file=(file_path.name, audio_file, mime_type),
                     response_format="verbose_json",  # Get timestamps and confidence
-                    prompt="This is a Triangle area planning commission meeting discussing development projects, zoning, and permits."
+                    prompt="This is a Triangle area planning commission meeting discussing development projects, zoning, and permits.",
+                    timeout=_UPLOAD_TIMEOUT
                 )
             
             return {
@@ -94,44 +289,65 @@ class TranscriptionService:
                 "transcript": None
             }
     
-    async def _enhance_transcript(self, raw_transcript: str, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    def _transcribe_local(self, file_path: Path) -> Dict[str, Any]:
         """
-        Use Claude to clean up transcript and identify speakers/sections
+        Transcribe with faster-whisper, batching 30s windows through one model (blocking)
         """
         try:
-            enhancement_prompt = f"""
-            Clean up this Triangle planning meeting transcript and organize it for analysis.
-            
-            Meeting Context:
-            - Jurisdiction: {meeting_info.get('jurisdiction', 'Unknown')}
-            - Date: {meeting_info.get('date', 'Unknown')}
-            - Meeting Type: {meeting_info.get('type', 'Planning Commission')}
+            with self._local_pipeline_lock:
+                if self._local_pipeline is None:
+                    import ctranslate2
+                    from faster_whisper import BatchedInferencePipeline, WhisperModel
+                    
+                    on_gpu = ctranslate2.get_cuda_device_count() > 0
+                    model = WhisperModel(
+                        self.local_model_size,
+                        device="cuda" if on_gpu else "cpu",
+                        compute_type=self.local_compute_type or ("int8_float16" if on_gpu else "int8")
+                    )
+                    self._local_pipeline = BatchedInferencePipeline(model=model)
             
-            Please:
-            1. Fix obvious transcription errors
-            2. Identify distinct speakers when possible (Chair, Commissioners, Staff, Public)
-            3. Break into logical sections (Agenda items, Project discussions, Public comments)
-            4. Preserve all project names, addresses, developer names, and vote outcomes
-            
-            Return JSON format:
-            {{
-                "text": "cleaned_full_transcript",
-                "sections": [
-                    {{
-                        "title": "section_name",
-                        "content": "section_content",
-                        "speakers": ["list_of_speakers"],
-                        "key_topics": ["project_names", "addresses"]
-                    }}
-                ]
-            }}
+            segments, info = self._local_pipeline.transcribe(
+                str(file_path),
+                batch_size=self.local_batch_size,
+                vad_filter=True,  # Silero VAD drops non-speech before it reaches the encoder
+                vad_parameters={"min_silence_duration_ms": self.vad_min_silence_ms},
+                initial_prompt="This is a Triangle area planning commission meeting discussing development projects, zoning, and permits."
+            )
+            segments = [
+                {"id": segment.id, "start": segment.start, "end": segment.end, "text": segment.text}
+                for segment in segments  # Generator: decoding happens while iterating
+            ]
             
-            Original Transcript:
-            {raw_transcript[:8000]}  # Limit to avoid token limits
-            """
+            return {
+                "success": True,
+                "transcript": "".join(segment["text"] for segment in segments).strip(),
+                "duration": info.duration,
+                "language": info.language,
+                "segments": segments
+            }
             
+        except ImportError:
+            return {
+                "success": False,
+                "error": "faster-whisper backend requested but the faster-whisper package is not installed",
+                "transcript": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"faster-whisper error: {str(e)}",
+                "transcript": None
+            }
+    
+    async def _enhance_transcript(self, raw_transcript: str, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Use Claude to clean up transcript and identify speakers/sections
+        """
+        try:
             # This would use Claude API - placeholder for now
-            # In production, you'd call Claude API here
+            # In production, you'd build the prompt with _build_enhancement_prompt (in
+            # asyncio.to_thread: it tokenizes the whole transcript) and call Claude API here
             return {
                 "text": raw_transcript,  # Return original for now
                 "sections": []
@@ -144,16 +360,107 @@ class TranscriptionService:
                 "error": f"Enhancement failed: {str(e)}"
             }
     
-    async def _handle_large_file(self, file_path: Path, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_enhancement_prompt(self, raw_transcript: str, meeting_info: Dict[str, Any]) -> str:
+        """
+        Build the transcript clean-up prompt, with the transcript cut to its token budget
+        """
+        return _ENHANCE_PROMPT_TEMPLATE.format_map({
+            "jurisdiction": meeting_info.get('jurisdiction', 'Unknown'),
+            "date": meeting_info.get('date', 'Unknown'),
+            "type": meeting_info.get('type', 'Planning Commission'),
+            "transcript": _truncate_tokens(raw_transcript, _ENHANCE_TRANSCRIPT_TOKENS)
+        })
+    
+    async def _handle_large_file(self, file_path: Path, on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
+        """
+        Split large files at silences and transcribe the chunks concurrently
         """
-        Split large files into chunks for processing
+        chunk_dir = Path(tempfile.mkdtemp(prefix="whisper_chunks_"))
+        try:
+            chunks = await self._split_audio(file_path, chunk_dir)
+            semaphore = asyncio.Semaphore(self.max_concurrent_uploads)
+            
+            async def _transcribe_chunk(index: int, chunk_path: Path) -> Dict[str, Any]:
+                async with semaphore:
+                    result = await self._transcribe_file(chunk_path)
+                if on_chunk and result["success"]:
+                    await on_chunk(index, result)
+                return result
+            
+            results = await asyncio.gather(*[_transcribe_chunk(i, chunk_path) for i, (chunk_path, _) in enumerate(chunks)])
+            
+            for i, result in enumerate(results, 1):
+                if not result["success"]:
+                    return {**result, "error": f"Chunk {i} of {len(results)}: {result['error']}"}
+            
+            return self._merge_chunk_results(results, [offset for _, offset in chunks])
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Chunked transcription failed: {str(e)}",
+                "transcript": None
+            }
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+    
+    async def _split_audio(self, file_path: Path, chunk_dir: Path) -> List[Tuple[Path, float]]:
         """
-        # For now, reject large files - implement chunking later
+        Cut audio into chunks under the upload limit without re-encoding
+
+        Cut points are moved to the nearest detected silence so words aren't split.
+        Returns (chunk_path, start_offset_seconds) pairs in playback order.
+        """
+        duration = await _probe_duration(file_path)
+        chunk_count = math.ceil(file_path.stat().st_size / self.chunk_target_size)
+        if self.max_chunk_seconds:
+            chunk_count = max(chunk_count, math.ceil(duration / self.max_chunk_seconds))
+        chunk_duration = duration / chunk_count
+        
+        silence_log = await _run_command(
+            "ffmpeg", "-hide_banner", "-i", str(file_path),
+            "-af", "silencedetect=n=-30dB:d=0.5", "-f", "null", "-",
+            stderr=True
+        )
+        silences = [float(end) - float(length) / 2 for end, length in _SILENCE_END_RE.findall(silence_log)]
+        
+        # Snap each ideal boundary to a silence within a quarter chunk of it
+        boundaries = [0.0]
+        for k in range(1, chunk_count):
+            ideal = k * chunk_duration
+            nearby = [t for t in silences if abs(t - ideal) < chunk_duration / 4]
+            boundaries.append(min(nearby, key=lambda t: abs(t - ideal)) if nearby else ideal)
+        boundaries.append(duration)
+        
+        chunks = []
+        for i, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+            chunk_path = chunk_dir / f"chunk_{i:03d}{file_path.suffix}"
+            await _run_command(
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-ss", f"{start:.3f}", "-i", str(file_path), "-t", f"{end - start:.3f}",
+                "-vn", "-c", "copy", str(chunk_path)
+            )
+            chunks.append((chunk_path, start))
+        return chunks
+    
+    def _merge_chunk_results(self, results: List[Dict[str, Any]], offsets: List[float]) -> Dict[str, Any]:
+        """
+        Stitch chunk transcripts together, shifting segment times onto the full-file timeline
+        """
+        segments = []
+        for result, offset in zip(results, offsets):
+            for segment in result.get("segments") or []:
+                segment = _segment_dict(segment)
+                segment["start"] += offset
+                segment["end"] += offset
+                segments.append(segment)
+        
         return {
-            "success": False,
-            "error": f"File too large ({file_path.stat().st_size / 1024 / 1024:.1f}MB). Maximum size is 25MB.",
-            "transcript": None,
-            "suggestion": "Please use audio optimization tools to reduce file size or implement file chunking."
+            "success": True,
+            "transcript": " ".join(result["transcript"].strip() for result in results),
+            "duration": sum(result.get("duration") or 0 for result in results),
+            "language": results[0].get("language"),
+            "segments": segments
         }
     
     def _calculate_cost(self, duration_minutes: float) -> float:
@@ -164,46 +471,230 @@ class TranscriptionService:
             return 0.0
         return duration_minutes * 0.006  # $0.006 per minute
 
+def _segment_dict(segment: Any) -> Dict[str, Any]:
+    """
+    Copy a Whisper segment (SDK model or dict) into a plain dict
+    """
+    return segment.model_dump() if hasattr(segment, "model_dump") else dict(segment)
+
+@lru_cache(maxsize=1)
+def _encoding() -> tiktoken.Encoding:
+    """
+    Tokenizer for the analysis model
+    """
+    return tiktoken.encoding_for_model("gpt-4o")
+
+def _pack_windows(text: str, max_tokens: int, final: bool = False) -> Tuple[List[str], str]:
+    """
+    Greedily pack whole sentences of text into windows of at most max_tokens
+
+    Returns (windows, rest). Unless final, the open window and the last (possibly
+    unfinished) sentence are returned as rest to be packed again once more text is
+    appended, so feeding a transcript in pieces yields the same windows as feeding it whole.
+    """
+    encoding = _encoding()
+    sentences = [sentence for sentence in _SENTENCE_END_RE.split(text) if sentence]
+    held_back = [] if final else sentences[-1:]
+    if not final:
+        sentences = sentences[:-1]
+    
+    windows, current, current_tokens = [], [], 0
+    for sentence in sentences:
+        tokens = encoding.encode(sentence)
+        # +1 for the space that joins it to the previous sentence
+        if current and current_tokens + len(tokens) + 1 > max_tokens:
+            windows.append(" ".join(current))
+            current, current_tokens = [], 0
+        if len(tokens) > max_tokens:
+            # Run-on text with no sentence breaks: cut on token boundaries
+            windows.extend(encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens), max_tokens))
+            continue
+        current.append(sentence)
+        current_tokens += len(tokens) + 1
+    
+    if final:
+        if current:
+            windows.append(" ".join(current))
+        return windows, ""
+    return windows, " ".join(current + held_back)
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens tokens, always on a token boundary
+    """
+    tokens = _encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding().decode(tokens[:max_tokens])
+
+def file_sha256(file_path: Path) -> str:
+    """
+    SHA-256 of a file, remembered while its size and mtime are unchanged
+    """
+    stat = os.stat(file_path)
+    return _sha256_of(os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=64)
+def _sha256_of(path: str, size: int, mtime_ns: int) -> str:
+    """
+    Hash a file in constant memory (size and mtime_ns only key the cache)
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+async def _probe_duration(file_path: Path) -> float:
+    """
+    Audio duration in seconds, via ffprobe
+    """
+    return float(await _run_command(
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", str(file_path)
+    ))
+
+async def _run_command(*args: str, stderr: bool = False) -> str:
+    """
+    Run an ffmpeg/ffprobe command without blocking the event loop; returns stdout (or stderr)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr_output = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"{args[0]} failed: {stderr_output.decode(errors='replace').strip()[-500:]}")
+    return (stderr_output if stderr else stdout).decode(errors="replace")
+
 # Meeting Analysis Service
+# Structured JSON extraction doesn't need the larger model
+ANALYSIS_MODEL = "gpt-4o-mini"
+
+# Static instructions and schema go in the system message so repeated calls share a cacheable prompt prefix
+ANALYSIS_SYSTEM_PROMPT = """You are an expert Triangle area development analyst who extracts key information from planning meetings for a professional newsletter.
+
+Extract and return JSON with these sections:
+
+{
+    "projects": [
+        {
+            "name": "project_name",
+            "address": "street_address",
+            "developer": "developer_company",
+            "applicant": "applicant_name",
+            "project_type": "residential/commercial/mixed-use/etc",
+            "current_status": "application/review/approval/denial/deferred",
+            "vote_outcome": "approved/denied/deferred/no_vote",
+            "vote_details": "vote_count_if_available",
+            "key_concerns": ["list", "of", "concerns"],
+            "conditions": ["approval", "conditions"],
+            "timeline": "next_steps_or_deadlines",
+            "opposition": "summary_of_public_opposition",
+            "staff_recommendation": "staff_position"
+        }
+    ],
+    "regulatory_changes": [
+        {
+            "topic": "ordinance/fee/policy_change",
+            "description": "what_changed",
+            "impact": "effect_on_development",
+            "effective_date": "when_it_takes_effect"
+        }
+    ],
+    "market_intelligence": [
+        {
+            "trend": "observed_pattern",
+            "description": "trend_details",
+            "implications": "what_it_means_for_developers"
+        }
+    ],
+    "key_people": [
+        {
+            "name": "person_name",
+            "role": "commissioner/staff/developer",
+            "notable_positions": "key_statements_or_positions"
+        }
+    ],
+    "newsletter_highlights": [
+        "Most important takeaway 1",
+        "Most important takeaway 2",
+        "Most important takeaway 3"
+    ]
+}
+
+Focus on actionable intelligence that Triangle development professionals need to know."""
+
+# Forcing this function call makes the model emit arguments shaped by the AnalysisOut schema
+ANALYSIS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "emit_analysis",
+        "description": "Record the development intelligence extracted from the meeting",
+        "parameters": AnalysisOut.model_json_schema()
+    }
+}
+
 class MeetingAnalysisService:
-    def __init__(self):
-        # Initialize Claude/OpenAI clients for analysis
-        self.openai_client = openai.AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self.openai_client = client or get_openai_client()
+        self.semantic_cache = False  # Reuse the analysis of a near-identical transcript (embedding similarity)
     
-    async def analyze_transcript(self, transcript: str, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_transcript(self, transcript: str, meeting_info: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None, analyzed_at: Optional[str] = None, whole_meeting: bool = True) -> Dict[str, Any]:
         """
         Extract development intelligence from meeting transcript
+
+        When on_delta is given the completion is streamed and each text delta is passed
+        to it as it arrives, so callers can show progress before the JSON is complete.
+        Pass whole_meeting=False for part of a transcript: the semantic cache is skipped,
+        since boilerplate stretches (roll call, adjournment) look alike across meetings.
         """
         try:
-            analysis_prompt = self._build_analysis_prompt(transcript, meeting_info)
+            embedding = None
+            if self.semantic_cache and whole_meeting:
+                embedding = await semantic_cache.embed(self.openai_client, transcript)
+                hit = await asyncio.to_thread(semantic_cache.lookup, embedding)
+                if hit:
+                    return {
+                        "success": True,
+                        "analysis": hit["analysis"],
+                        "meeting_info": meeting_info,
+                        "analyzed_at": analyzed_at or datetime.now().isoformat(),
+                        "token_usage": None,
+                        "cached": True,
+                        "similarity": hit["similarity"]
+                    }
             
-            # Use GPT-4 for comprehensive analysis
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4",
+            # Tokenizing a long transcript is CPU work; keep it off the event loop
+            analysis_prompt = await asyncio.to_thread(self._build_analysis_prompt, transcript, meeting_info)
+            
+            # The shared system prefix is prompt-cached by OpenAI; identical requests hit the local cache
+            response = await llm_cache.acached_chat(
+                self.openai_client,
+                on_delta=on_delta,
+                model=ANALYSIS_MODEL,
+                tools=[ANALYSIS_TOOL],
+                tool_choice={"type": "function", "function": {"name": "emit_analysis"}},
                 messages=[
-                    {"role": "system", "content": "You are an expert Triangle area development analyst who extracts key information from planning meetings."},
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": analysis_prompt}
                 ],
-                temperature=0.1  # Low temperature for consistent extraction
+                temperature=0.1,  # Low temperature for consistent extraction
+                # Validated before caching, so a truncated or malformed reply is never replayed
+                validate=AnalysisOut.model_validate_json
             )
             
-            # Parse the structured response
-            analysis_text = response.choices[0].message.content
-            
-            # Try to parse as JSON, fall back to text if needed
-            try:
-                analysis_data = json.loads(analysis_text)
-            except json.JSONDecodeError:
-                analysis_data = {"raw_analysis": analysis_text}
+            # The forced tool call returns schema-shaped JSON arguments; validation normalizes them.
+            # Fields the model left empty are dropped so display defaults apply to them.
+            analysis_data = response["parsed"].model_dump(exclude_none=True)
+            if embedding is not None:
+                await asyncio.to_thread(semantic_cache.add, embedding, analysis_data)
             
             return {
                 "success": True,
                 "analysis": analysis_data,
                 "meeting_info": meeting_info,
-                "analyzed_at": datetime.now().isoformat(),
-                "token_usage": response.usage.total_tokens if hasattr(response, 'usage') else None
+                "analyzed_at": analyzed_at or datetime.now().isoformat(),
+                "token_usage": response["total_tokens"],
+                "cached": response["cached"]
             }
             
         except Exception as e:
@@ -215,92 +706,101 @@ class MeetingAnalysisService:
     
     def _build_analysis_prompt(self, transcript: str, meeting_info: Dict[str, Any]) -> str:
         """
-        Build comprehensive analysis prompt for Triangle development intelligence
-        """
-        return f"""
-        Analyze this {meeting_info.get('jurisdiction', 'Triangle')} planning meeting transcript and extract development intelligence for a professional newsletter.
-        
-        Meeting Details:
-        - Jurisdiction: {meeting_info.get('jurisdiction', 'Unknown')}
-        - Date: {meeting_info.get('date', 'Unknown')}
-        - Type: {meeting_info.get('type', 'Planning Commission')}
-        
-        Extract and return JSON with these sections:
-        
-        {{
-            "projects": [
-                {{
-                    "name": "project_name",
-                    "address": "street_address",
-                    "developer": "developer_company",
-                    "applicant": "applicant_name",
-                    "project_type": "residential/commercial/mixed-use/etc",
-                    "current_status": "application/review/approval/denial/deferred",
-                    "vote_outcome": "approved/denied/deferred/no_vote",
-                    "vote_details": "vote_count_if_available",
-                    "key_concerns": ["list", "of", "concerns"],
-                    "conditions": ["approval", "conditions"],
-                    "timeline": "next_steps_or_deadlines",
-                    "opposition": "summary_of_public_opposition",
-                    "staff_recommendation": "staff_position"
-                }}
-            ],
-            "regulatory_changes": [
-                {{
-                    "topic": "ordinance/fee/policy_change",
-                    "description": "what_changed",
-                    "impact": "effect_on_development",
-                    "effective_date": "when_it_takes_effect"
-                }}
-            ],
-            "market_intelligence": [
-                {{
-                    "trend": "observed_pattern",
-                    "description": "trend_details",
-                    "implications": "what_it_means_for_developers"
-                }}
-            ],
-            "key_people": [
-                {{
-                    "name": "person_name",
-                    "role": "commissioner/staff/developer",
-                    "notable_positions": "key_statements_or_positions"
-                }}
-            ],
-            "newsletter_highlights": [
-                "Most important takeaway 1",
-                "Most important takeaway 2",
-                "Most important takeaway 3"
-            ]
-        }}
-        
-        Focus on actionable intelligence that Triangle development professionals need to know.
-        
-        Transcript:
-        {transcript[:12000]}  # Limit transcript to avoid token limits
+        Build the meeting-specific user message; the schema lives in ANALYSIS_SYSTEM_PROMPT
         """
+        return _ANALYSIS_USER_TEMPLATE.format_map({
+            "region": meeting_info.get('jurisdiction', 'Triangle'),
+            "jurisdiction": meeting_info.get('jurisdiction', 'Unknown'),
+            "date": meeting_info.get('date', 'Unknown'),
+            "type": meeting_info.get('type', 'Planning Commission'),
+            "transcript": _truncate_tokens(transcript, _ANALYSIS_TRANSCRIPT_TOKENS)
+        })
 
 # Usage example and integration
 class MeetingProcessor:
-    def __init__(self):
-        self.transcription_service = TranscriptionService()
-        self.analysis_service = MeetingAnalysisService()
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None, transcription_backend: str = "openai"):
+        client = client or get_openai_client()
+        self.transcription_service = TranscriptionService(client, backend=transcription_backend)
+        self.analysis_service = MeetingAnalysisService(client)
+        self.max_concurrent_analyses = 4  # Parallel analysis requests per file, like max_concurrent_uploads
     
-    async def process_meeting_file(self, file_path: str, meeting_info: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_meeting_file(self, file_path: str, meeting_info: Dict[str, Any], transcript_result: Optional[Dict[str, Any]] = None, on_transcript: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
         """
         Complete pipeline: audio -> transcript -> analysis
+
+        The transcript is analyzed in windows of whole sentences sized to the analysis
+        token budget. A window is analyzed as soon as the chunks covering it have
+        been transcribed, so analysis overlaps transcription of later chunks. Pass a
+        previous transcript_result to rerun only the analysis; it is windowed the same
+        way, so a rerun sees the same windows as a fresh run. on_transcript(transcript_result)
+        is awaited once a fresh transcription succeeds, before waiting on the analysis,
+        so callers can persist it even if analysis fails or the run is interrupted.
         """
-        # Step 1: Transcribe
-        transcript_result = await self.transcription_service.transcribe_meeting(file_path, meeting_info)
+        # One timestamp for the whole run, shared by every stage's result
+        processed_at = datetime.now().isoformat()
+        analysis_tasks: Dict[int, asyncio.Task] = {}
+        semaphore = asyncio.Semaphore(self.max_concurrent_analyses)
+        
+        async def analyze(transcript: str, whole_meeting: bool) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analysis_service.analyze_transcript(transcript, meeting_info, analyzed_at=processed_at, whole_meeting=whole_meeting)
+        
+        def start_windows(windows: List[str], final: bool = False):
+            whole_meeting = final and not analysis_tasks and len(windows) == 1
+            for window in windows:
+                analysis_tasks[len(analysis_tasks)] = asyncio.create_task(analyze(window, whole_meeting))
+        
+        # Chunks can finish out of order; text is packed into windows in playback order.
+        # Packing tokenizes, so it runs in a thread, one chunk at a time.
+        arrived: Dict[int, str] = {}
+        next_chunk = 0
+        unpacked = ""
+        pack_lock = asyncio.Lock()
+        
+        async def add_chunk(index: int, chunk_result: Dict[str, Any]):
+            nonlocal next_chunk, unpacked
+            async with pack_lock:
+                arrived[index] = chunk_result["transcript"].strip()
+                while next_chunk in arrived:
+                    text = arrived.pop(next_chunk)
+                    unpacked = f"{unpacked} {text}" if unpacked else text
+                    next_chunk += 1
+                windows, unpacked = await asyncio.to_thread(_pack_windows, unpacked, _ANALYSIS_TRANSCRIPT_TOKENS)
+                start_windows(windows)
+        
+        # Step 1: Transcribe (window analyses start in the background)
+        resumed = transcript_result is not None
+        if not resumed:
+            transcript_result = await self.transcription_service.transcribe_meeting(file_path, meeting_info, on_chunk=add_chunk, processed_at=processed_at)
+        else:
+            unpacked = transcript_result["transcript"].strip()
         
         if not transcript_result["success"]:
-            return transcript_result
+            for task in analysis_tasks.values():
+                task.cancel()
+            # Same shape as a completed run, so callers read failures from "errors" either way
+            return {
+                "success": False,
+                "transcript": None,
+                "analysis": None,
+                "meeting_info": meeting_info,
+                "errors": {
+                    "transcription_error": transcript_result.get("error"),
+                    "analysis_error": None
+                }
+            }
         
-        # Step 2: Analyze
-        analysis_result = await self.analysis_service.analyze_transcript(
-            transcript_result["transcript"], 
-            meeting_info
-        )
+        # Close the last window (for a resumed transcript, all of them); tokenizing
+        # a whole transcript is CPU work, so keep it off the event loop
+        windows, _ = await asyncio.to_thread(_pack_windows, unpacked, _ANALYSIS_TRANSCRIPT_TOKENS, True)
+        start_windows(windows, final=True)
+        
+        if on_transcript and not resumed:
+            await on_transcript(transcript_result)
+        
+        # Step 2: Collect window analyses
+        window_results = await asyncio.gather(*[analysis_tasks[i] for i in sorted(analysis_tasks)])
+        analysis_result = self._combine_window_analyses(window_results)
         
         # Combine results
         return {
@@ -312,10 +812,134 @@ class MeetingProcessor:
                 "transcription_cost": transcript_result.get("cost_estimate", 0),
                 "transcript_length": len(transcript_result["transcript"]) if transcript_result["transcript"] else 0,
                 "analysis_tokens": analysis_result.get("token_usage"),
-                "processed_at": datetime.now().isoformat()
+                "transcription_backend": transcript_result.get("backend"),
+                "local_transcription_error": transcript_result.get("local_error"),
+                "processed_at": processed_at
             },
             "errors": {
-                "transcription_error": None if transcript_result["success"] else transcript_result.get("error"),
-                "analysis_error": None if analysis_result["success"] else analysis_result.get("error")
+                "transcription_error": None,
+                "analysis_error": analysis_result.get("error")  # Also set when only some windows failed
+            }
+        }
+    
+    def _combine_window_analyses(self, window_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge per-window analyses into one, in transcript order
+
+        Entries describing the same project, person, change or trend (matched on
+        normalized keys) are combined, and list sections are capped. Windows whose
+        analysis failed are skipped and reported in "error".
+        """
+        if not window_results:
+            # Silent or music-only audio (or VAD dropping every segment) leaves no text to pack
+            return {
+                "success": False,
+                "analysis": None,
+                "token_usage": None,
+                "error": "Transcript is empty: no speech to analyze"
             }
-        }
\ No newline at end of file
+        
+        if len(window_results) == 1:
+            return window_results[0]
+        
+        succeeded = [result for result in window_results if result["success"]]
+        failed = [i for i, result in enumerate(window_results, 1) if not result["success"]]
+        if not succeeded:
+            return window_results[0]
+        
+        merged: Dict[str, Any] = {}
+        entries_by_key: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for result in succeeded:
+            for section, value in (result.get("analysis") or {}).items():
+                if not isinstance(value, list):
+                    merged.setdefault(section, value)
+                    continue
+                
+                items = merged.setdefault(section, [])
+                for item in value:
+                    if not isinstance(item, dict):
+                        items.append(item)
+                        continue
+                    
+                    keys = [
+                        (section, field, _normalize_key(item[field]))
+                        for field in _MERGE_KEYS.get(section, ()) if item.get(field)
+                    ]
+                    entry = next((entries_by_key[key] for key in keys if key in entries_by_key), None)
+                    if entry is None:
+                        entry = dict(item)
+                        items.append(entry)
+                    else:
+                        _merge_entry(entry, item)
+                    entries_by_key.update(dict.fromkeys(keys, entry))
+        
+        for section, items in merged.items():
+            if isinstance(items, list):
+                merged[section] = _cap_list(section, items)
+                for item in merged[section]:
+                    if isinstance(item, dict):
+                        for field, value in item.items():
+                            if isinstance(value, list):
+                                item[field] = _cap_list(field, value)
+        
+        token_counts = [result.get("token_usage") for result in succeeded if result.get("token_usage")]
+        error = None
+        if failed:
+            first_error = window_results[failed[0] - 1].get("error")
+            error = f"Analysis of transcript window(s) {', '.join(map(str, failed))} of {len(window_results)} failed: {first_error}"
+        return {
+            "success": True,
+            "analysis": merged,
+            "token_usage": sum(token_counts) if token_counts else None,
+            "error": error
+        }
+
+# Entries in these sections are the same one when any of these fields match after normalizing
+_MERGE_KEYS = {
+    "projects": ("name", "address"),
+    "key_people": ("name",),
+    "regulatory_changes": ("topic",),
+    "market_intelligence": ("trend",)
+}
+
+# Longest a merged list may grow; the prompt asks each analysis for about three highlights
+_MERGED_LIST_LIMITS = {
+    "newsletter_highlights": 5,
+    "key_concerns": 8,
+    "conditions": 8
+}
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+def _normalize_key(value: Any) -> str:
+    """
+    Case- and punctuation-insensitive form of a name, address or phrase
+    """
+    return _NON_WORD_RE.sub(" ", str(value)).strip().lower()
+
+def _merge_entry(entry: Dict[str, Any], item: Dict[str, Any]) -> None:
+    """
+    Fill entry's empty fields from item and union their list fields
+    """
+    for field, value in item.items():
+        current = entry.get(field)
+        if isinstance(current, list) and isinstance(value, list):
+            entry[field] = current + value
+        elif current in (None, "", []):
+            entry[field] = value
+
+def _cap_list(name: str, items: List[Any]) -> List[Any]:
+    """
+    Drop repeated strings (after normalizing) and cut to the section's limit, if it has one
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        if isinstance(item, str):
+            key = _normalize_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(item)
+    limit = _MERGED_LIST_LIMITS.get(name)
+    return unique[:limit] if limit else unique
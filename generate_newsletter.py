@@ -4,12 +4,48 @@ Newsletter Content Generator for Triangle Development Digest
 Transform meeting analysis into professional newsletter sections
 """
 
+import asyncio
+import httpx
+import io
 import openai
+import orjson
 import os
-import json
 from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
 
-def generate_newsletter_content(analysis_file: str):
+from app.services import analysis_store, llm_cache
+
+# All sections come from one call that includes the executive summary, so it uses
+# gpt-4o for prose quality. Requests also go through llm_cache, so re-running on the
+# same analysis file costs nothing.
+NEWSLETTER_MODEL = "gpt-4o"
+
+def _make_client(api_key: str):
+    """
+    Build an AsyncOpenAI client; use it with `async with` inside one event loop,
+    since its connection pool is bound to the loop that first uses it
+    """
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        )
+    )
+
+def meeting_context(meeting_info):
+    """Resolve meeting fields and their fallbacks once for every section, display and save step"""
+    jurisdiction = meeting_info.get('jurisdiction') or 'Triangle'
+    meeting_type = meeting_info.get('type') or 'Planning Commission'
+    date = meeting_info.get('date') or 'Unknown'
+    return SimpleNamespace(
+        jurisdiction=jurisdiction,
+        type=meeting_type,
+        date=date,
+        title=f"{jurisdiction} {meeting_type} - {date}"
+    )
+
+async def generate_newsletter_content(analysis_file: str):
     """
     Generate professional newsletter content from meeting analysis
     """
@@ -19,18 +55,17 @@ def generate_newsletter_content(analysis_file: str):
     
     # Load analysis data
     try:
-        with open(analysis_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = await asyncio.to_thread(analysis_store.load, analysis_file)
         print(f"✅ Analysis loaded successfully")
     except FileNotFoundError:
         print(f"❌ Analysis file not found: {analysis_file}")
         return None
     
-    meeting_info = data.get('meeting_info', {})
+    ctx = meeting_context(data.get('meeting_info', {}))
     analysis = data.get('analysis', {})
     
-    print(f"🏛️ Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')}")
-    print(f"📅 Date: {meeting_info.get('date')}")
+    print(f"🏛️ Meeting: {ctx.jurisdiction} {ctx.type}")
+    print(f"📅 Date: {ctx.date}")
     
     # Check API key
     api_key = os.getenv("OPENAI_API_KEY")
@@ -38,240 +73,146 @@ def generate_newsletter_content(analysis_file: str):
         print("❌ Error: OPENAI_API_KEY not set")
         return None
     
-    client = openai.OpenAI(api_key=api_key)
+    # Compact JSON, serialized once: indentation only adds prompt tokens
+    analysis_json = orjson.dumps(analysis).decode()
     
-    print("\n🤖 Generating newsletter content with GPT-4...")
+    print(f"\n🤖 Generating newsletter content with {NEWSLETTER_MODEL}...")
     
-    # Generate different newsletter sections
-    newsletter_sections = {}
-    
-    # 1. Project Pipeline Section
+    # Pipeline and People & Politics are only written when there is data for them
+    section_keys = ['executive_summary']
     if analysis.get('projects'):
-        print("📝 Generating Project Pipeline section...")
-        pipeline_content = generate_project_pipeline(client, analysis, meeting_info)
-        newsletter_sections['project_pipeline'] = pipeline_content
-    
-    # 2. Market Intelligence Section  
-    print("📊 Generating Market Intelligence section...")
-    market_content = generate_market_intelligence(client, analysis, meeting_info)
-    newsletter_sections['market_intelligence'] = market_content
-    
-    # 3. Regulatory Watch Section
-    print("📋 Generating Regulatory Watch section...")
-    regulatory_content = generate_regulatory_watch(client, analysis, meeting_info)
-    newsletter_sections['regulatory_watch'] = regulatory_content
-    
-    # 4. People & Politics Section
+        section_keys.append('project_pipeline')
+    section_keys += ['market_intelligence', 'regulatory_watch']
     if analysis.get('key_people'):
-        print("👥 Generating People & Politics section...")
-        people_content = generate_people_politics(client, analysis, meeting_info)
-        newsletter_sections['people_politics'] = people_content
+        section_keys.append('people_politics')
     
-    # 5. Executive Summary
-    print("📋 Generating Executive Summary...")
-    executive_summary = generate_executive_summary(client, analysis, meeting_info)
-    newsletter_sections['executive_summary'] = executive_summary
+    # One call writes every section, sending the analysis data once instead of per section
+    print(f"📝 Generating sections: {', '.join(section_keys)}")
+    async with _make_client(api_key) as client:
+        newsletter_sections = await generate_sections(client, analysis_json, ctx, section_keys)
     
     # Display and save results
-    display_newsletter_content(newsletter_sections, meeting_info)
-    save_newsletter_content(newsletter_sections, meeting_info)
+    display_newsletter_content(newsletter_sections, ctx)
+    save_newsletter_content(newsletter_sections, ctx)
     
     print("✅ Newsletter content generation completed!")
     return newsletter_sections
 
-def generate_project_pipeline(client, analysis, meeting_info):
-    """Generate Project Pipeline section"""
-    projects = analysis.get('projects', [])
-    
-    prompt = f"""
-Write a professional "Project Pipeline" section for the Triangle Development Digest newsletter.
+NEWSLETTER_STYLE = """You write the Triangle Development Digest, a professional newsletter for real estate developers, builders and land-use attorneys working in the Raleigh-Durham-Chapel Hill area.
 
-Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}
+You receive structured intelligence extracted from local planning meetings (projects, votes, regulatory changes, market trends and key people) and turn it into publication-ready newsletter sections.
 
-Projects to cover:
-{json.dumps(projects, indent=2)}
-
-Style Guidelines:
+House style:
 - Professional but accessible tone
+- Actionable intelligence for development professionals
+- Specific details (addresses, developers, vote counts, dates) over generalities
+- Never invent facts that are not in the supplied data
+- Every section opens with a compelling headline"""
+
+# Section key -> writing contract, in the order sections appear in the newsletter
+SECTION_INSTRUCTIONS = {
+    "executive_summary": """"Executive Summary" - written as an executive briefing for Triangle development professionals.
+Create a compelling executive summary that:
+- Captures the most important developments for Triangle developers
+- Highlights key opportunities and risks (draw on newsletter_highlights)
+- Provides actionable takeaways
+- Sets context for the detailed sections that follow
+Style: Executive briefing tone - concise but comprehensive
+Length: 75-125 words
+Start with a strong headline that captures the meeting's significance.""",
+
+    "project_pipeline": """"Project Pipeline" - written from the projects data.
 - Focus on actionable intelligence for developers
 - Include specific project details (addresses, developers, timelines)
 - Highlight vote outcomes and next steps
-- 150-250 words
 - Use bullet points for key details
+Length: 150-250 words
+Format as a complete newsletter section with a compelling headline.""",
 
-Format as a complete newsletter section with a compelling headline.
-"""
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a professional newsletter writer for Triangle development professionals."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating project pipeline content: {str(e)}"
-
-def generate_market_intelligence(client, analysis, meeting_info):
-    """Generate Market Intelligence section"""
-    
-    prompt = f"""
-Write a "Market Intelligence" section for the Triangle Development Digest newsletter.
-
-Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}
-
-Analysis Data:
-{json.dumps(analysis, indent=2)}
-
+    "market_intelligence": """"Market Intelligence" - written as a market analyst specializing in Triangle area development trends.
 Focus on:
 - Development trends observed in this meeting
 - Commissioner attitudes toward development
 - Opposition patterns and community concerns
 - Process insights that affect project timelines
 - Strategic implications for developers
-
 Style: Insightful analysis that helps developers understand the political and market landscape.
 Length: 150-200 words
-Include a compelling headline.
-"""
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a market analyst specializing in Triangle area development trends."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating market intelligence content: {str(e)}"
-
-def generate_regulatory_watch(client, analysis, meeting_info):
-    """Generate Regulatory Watch section"""
-    
-    prompt = f"""
-Write a "Regulatory Watch" section for the Triangle Development Digest newsletter.
-
-Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}
-
-Analysis Data:
-{json.dumps(analysis, indent=2)}
+Include a compelling headline.""",
 
+    "regulatory_watch": """"Regulatory Watch" - written as a regulatory affairs expert focused on Triangle development processes.
 Focus on:
 - Process changes or improvements mentioned
 - New requirements or conditions being imposed
 - Staff recommendation patterns
 - Timeline and deadline insights
 - Regulatory efficiency observations
-
 If no major regulatory changes were discussed, focus on process insights and timing observations that would help developers navigate the system more effectively.
-
 Style: Practical guidance for development professionals
 Length: 100-150 words
-Include headline focused on regulatory insights.
-"""
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a regulatory affairs expert focused on Triangle development processes."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating regulatory watch content: {str(e)}"
-
-def generate_people_politics(client, analysis, meeting_info):
-    """Generate People & Politics section"""
-    people = analysis.get('key_people', [])
-    
-    prompt = f"""
-Write a "People & Politics" section for the Triangle Development Digest newsletter.
-
-Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}
-
-Key People:
-{json.dumps(people, indent=2)}
+Include headline focused on regulatory insights.""",
 
+    "people_politics": """"People & Politics" - written as a political analyst covering Triangle development and planning politics, from the key_people data.
 Focus on:
 - Commissioner positions and voting patterns
 - Staff recommendations and their success rate
 - Developer/applicant strategies and presentations
 - Community opposition leaders and their concerns
 - Political dynamics that affect development approval
-
 Style: Professional insider intelligence that helps developers understand the human dynamics
 Length: 100-150 words
-Include headline about political insights or key relationships.
-"""
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a political analyst covering Triangle development and planning politics."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating people & politics content: {str(e)}"
+Include headline about political insights or key relationships."""
+}
 
-def generate_executive_summary(client, analysis, meeting_info):
-    """Generate Executive Summary section"""
-    highlights = analysis.get('newsletter_highlights', [])
-    
-    prompt = f"""
-Write an "Executive Summary" section for the Triangle Development Digest newsletter.
+# Identical for every meeting and placed first so OpenAI's automatic prompt caching can reuse it
+NEWSLETTER_SYSTEM_PROMPT = NEWSLETTER_STYLE + """
 
-Meeting: {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}
+Write only the sections the user requests. Return a JSON object whose keys are the requested section keys and whose values are the finished section text (markdown, headline included).
 
-Key Highlights:
-{chr(10).join([f"• {highlight}" for highlight in highlights])}
+Section contracts:
 
-Full Analysis:
-{json.dumps(analysis, indent=2)}
+""" + "\n\n".join(f"{key}: {instructions}" for key, instructions in SECTION_INSTRUCTIONS.items())
 
-Create a compelling executive summary that:
-- Captures the most important developments for Triangle developers
-- Highlights key opportunities and risks
-- Provides actionable takeaways
-- Sets context for the detailed sections that follow
+def build_newsletter_messages(analysis_json, ctx, section_keys):
+    """Static system prompt first; requested sections and meeting data last"""
+    return [
+        {"role": "system", "content": NEWSLETTER_SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"Meeting: {ctx.title}\n\n"
+            f"Sections to write: {', '.join(section_keys)}\n\n"
+            f"Analysis Data:\n{analysis_json}"
+        )}
+    ]
 
-Style: Executive briefing tone - concise but comprehensive
-Length: 75-125 words
-Start with a strong headline that captures the meeting's significance.
-"""
+async def generate_sections(client, analysis_json, ctx, section_keys):
+    """Generate all requested sections in one JSON-mode call"""
+    messages = build_newsletter_messages(analysis_json, ctx, section_keys)
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an executive briefing writer for Triangle development professionals."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
+        response = await llm_cache.acached_chat(
+            client,
+            model=NEWSLETTER_MODEL,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            validate=orjson.loads  # Only parseable replies are cached
         )
-        return response.choices[0].message.content
+        sections = response["parsed"]
     except Exception as e:
-        return f"Error generating executive summary content: {str(e)}"
+        return {key: f"Error generating newsletter content: {str(e)}" for key in section_keys}
+    
+    return {
+        key: sections.get(key) or f"Error generating {key.replace('_', ' ')} content: missing from response"
+        for key in section_keys
+    }
 
-def display_newsletter_content(sections, meeting_info):
+def display_newsletter_content(sections, ctx):
     """Display the generated newsletter content"""
     print("\n" + "=" * 80)
     print("📰 TRIANGLE DEVELOPMENT DIGEST - NEWSLETTER CONTENT")
     print("=" * 80)
     
-    print(f"\n📅 {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}")
+    print(f"\n📅 {ctx.title}")
     print("-" * 60)
     
     # Show sections in logical order
@@ -290,33 +231,39 @@ def display_newsletter_content(sections, meeting_info):
             print(sections[key])
             print()
 
-def save_newsletter_content(sections, meeting_info):
+def save_newsletter_content(sections, ctx):
     """Save newsletter content to files"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    jurisdiction = meeting_info.get('jurisdiction', 'triangle').lower()
+    now = datetime.now()
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
+    jurisdiction = ctx.jurisdiction.lower()
     
     # Save complete newsletter
     newsletter_file = f"newsletter_{jurisdiction}_{timestamp}.md"
     
-    with open(newsletter_file, 'w', encoding='utf-8') as f:
-        f.write(f"# Triangle Development Digest\n\n")
-        f.write(f"## {meeting_info.get('jurisdiction')} {meeting_info.get('type')} - {meeting_info.get('date')}\n\n")
-        
-        section_order = [
-            ('executive_summary', '## Executive Summary'),
-            ('project_pipeline', '## Project Pipeline'),
-            ('market_intelligence', '## Market Intelligence'), 
-            ('regulatory_watch', '## Regulatory Watch'),
-            ('people_politics', '## People & Politics')
-        ]
-        
-        for key, title in section_order:
-            if key in sections and sections[key]:
-                f.write(f"{title}\n\n")
-                f.write(f"{sections[key]}\n\n")
-                f.write("---\n\n")
-        
-        f.write(f"*Generated by PermitRDU AI on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}*\n")
+    # Build in memory, then write once and rename so a crash never leaves a partial file
+    buf = io.StringIO()
+    buf.write(f"# Triangle Development Digest\n\n")
+    buf.write(f"## {ctx.title}\n\n")
+    
+    section_order = [
+        ('executive_summary', '## Executive Summary'),
+        ('project_pipeline', '## Project Pipeline'),
+        ('market_intelligence', '## Market Intelligence'), 
+        ('regulatory_watch', '## Regulatory Watch'),
+        ('people_politics', '## People & Politics')
+    ]
+    
+    for key, title in section_order:
+        if key in sections and sections[key]:
+            buf.write(f"{title}\n\n")
+            buf.write(f"{sections[key]}\n\n")
+            buf.write("---\n\n")
+    
+    buf.write(f"*Generated by PermitRDU AI on {now.strftime('%B %d, %Y at %I:%M %p')}*\n")
+    
+    tmp_file = Path(f"{newsletter_file}.tmp")
+    tmp_file.write_text(buf.getvalue(), encoding='utf-8')
+    os.replace(tmp_file, newsletter_file)
     
     print(f"💾 Complete newsletter saved to: {newsletter_file}")
 
@@ -331,7 +278,7 @@ def main():
     print("Transforming meeting analysis into professional newsletter content")
     print()
     
-    result = generate_newsletter_content(analysis_file)
+    result = asyncio.run(generate_newsletter_content(analysis_file))
     
     if result:
         print("\n🎉 Newsletter content generated successfully!")
@@ -6,8 +6,71 @@ Simple transcription test for large files
 import asyncio
 import openai
 import os
+import re
+import subprocess
+import tempfile
+from collections import Counter
 from pathlib import Path
 
+# Shorten every pause over 1s to 0.5s so we don't pay Whisper for dead air
+SILENCE_TRIM_FILTER = "silenceremove=stop_periods=-1:stop_duration=1:stop_silence=0.5:stop_threshold=-40dB"
+
+# Keyword stem -> report label; stems match anywhere, like str.count, so "approved" counts as "approve"
+KEYWORD_LABELS = {
+    "project": "projects",
+    "development": "development",
+    "zoning": "zoning",
+    "approve": "approve",
+    "deny": "deny",
+    "motion": "motion",
+    "vote": "vote"
+}
+KEYWORD_PATTERN = re.compile("|".join(KEYWORD_LABELS), re.IGNORECASE)
+
+def probe_duration(file_path: str) -> float:
+    """
+    Audio duration in seconds, via ffprobe
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout)
+
+def trim_silence(file_path: str) -> str:
+    """
+    Write a silence-trimmed, speech-tuned Opus copy of the audio and return its path
+    """
+    output_file = str(Path(tempfile.gettempdir()) / f"{Path(file_path).stem}_trimmed.ogg")
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", file_path,
+         "-vn", "-af", SILENCE_TRIM_FILTER, "-ac", "1", "-ar", "16000",
+         "-c:a", "libopus", "-b:a", "24k", "-application", "voip", output_file],
+        check=True
+    )
+    return output_file
+
+def transcribe_file(client: openai.OpenAI, file_path: str) -> str:
+    """
+    Upload audio to Whisper and return the plain-text transcript (blocking)
+    """
+    with open(file_path, "rb") as audio_file:
+        return client.audio.transcriptions.create(
+            model="whisper-1",
+            file=audio_file,
+            response_format="text",
+            prompt="This is a Raleigh Planning Commission meeting discussing development projects, zoning, and permits."
+        )
+
+def save_transcript(output_file: str, transcript: str):
+    """
+    Write the transcript via a temp file and rename, so a crash never leaves a partial file
+    """
+    tmp_file = Path(f"{output_file}.tmp")
+    tmp_file.write_text(transcript, encoding="utf-8")
+    os.replace(tmp_file, output_file)
+
 async def simple_transcribe_test(file_path: str):
     """
     Simple test that handles large files by using OpenAI Whisper directly
@@ -15,13 +78,17 @@ async def simple_transcribe_test(file_path: str):
     print(f"🎯 Testing Transcription")
     print(f"📁 File: {file_path}")
     
+    loop = asyncio.get_running_loop()
+    
     # Check if file exists
-    if not Path(file_path).exists():
+    try:
+        file_stat = await loop.run_in_executor(None, os.stat, file_path)
+    except FileNotFoundError:
         print(f"❌ Error: File not found - {file_path}")
         return False
     
     # Check file size
-    file_size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+    file_size_mb = file_stat.st_size / (1024 * 1024)
     print(f"📊 File size: {file_size_mb:.1f} MB")
     
     # Check API key
@@ -32,6 +99,19 @@ async def simple_transcribe_test(file_path: str):
     
     print("✅ Environment ready")
     
+    # Trim silence before upload (ffmpeg runs in a worker thread)
+    audio_minutes = None
+    try:
+        original_minutes = await loop.run_in_executor(None, probe_duration, file_path) / 60
+        print("✂️ Trimming silence with ffmpeg...")
+        upload_path = await loop.run_in_executor(None, trim_silence, file_path)
+        audio_minutes = await loop.run_in_executor(None, probe_duration, upload_path) / 60
+        print(f"⏱️ Audio length: {original_minutes:.1f} min → {audio_minutes:.1f} min "
+              f"(saves ~${(original_minutes - audio_minutes) * 0.006:.3f})")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ Silence trimming skipped ({e}); uploading original file")
+        upload_path = file_path
+    
     try:
         # Initialize OpenAI client
         client = openai.OpenAI(api_key=api_key)
@@ -39,18 +119,13 @@ async def simple_transcribe_test(file_path: str):
         print("🤖 Starting transcription with OpenAI Whisper...")
         print("⏱️ This may take several minutes for large files...")
         
-        # Open and transcribe the file
-        with open(file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text",
-                prompt="This is a Raleigh Planning Commission meeting discussing development projects, zoning, and permits."
-            )
+        # The upload blocks for minutes, so run it in a worker thread
+        transcript = await loop.run_in_executor(None, transcribe_file, client, upload_path)
         
         print("✅ Transcription completed!")
         print(f"📝 Transcript length: {len(transcript)} characters")
-        print(f"💰 Estimated cost: ${(file_size_mb * 0.006 / 60):.3f}")
+        if audio_minutes is not None:
+            print(f"💰 Estimated cost: ${audio_minutes * 0.006:.3f}")
         
         # Show first 500 characters as preview
         print("\n📄 Transcript Preview:")
@@ -60,27 +135,17 @@ async def simple_transcribe_test(file_path: str):
         
         # Save full transcript
         output_file = f"transcript_raleigh_{Path(file_path).stem}.txt"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(transcript)
+        await loop.run_in_executor(None, save_transcript, output_file, transcript)
         
         print(f"💾 Full transcript saved to: {output_file}")
         
-        # Basic analysis - count key words
-        transcript_lower = transcript.lower()
-        keywords = {
-            "projects": transcript_lower.count("project"),
-            "development": transcript_lower.count("development"),
-            "zoning": transcript_lower.count("zoning"),
-            "approve": transcript_lower.count("approve"),
-            "deny": transcript_lower.count("deny"),
-            "motion": transcript_lower.count("motion"),
-            "vote": transcript_lower.count("vote")
-        }
+        # Basic analysis - count key words in a single pass
+        counts = Counter(match.group(0).lower() for match in KEYWORD_PATTERN.finditer(transcript))
         
         print(f"\n📊 Quick Analysis:")
-        for word, count in keywords.items():
-            if count > 0:
-                print(f"  • {word.title()}: {count} mentions")
+        for stem, label in KEYWORD_LABELS.items():
+            if counts[stem] > 0:
+                print(f"  • {label.title()}: {counts[stem]} mentions")
         
         return True
         
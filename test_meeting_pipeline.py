@@ -9,23 +9,92 @@ Usage:
 
 Example:
 python test_meeting_pipeline.py --file downloads/raleigh_planning_20241210.mp3 --jurisdiction "Raleigh" --date "2024-12-10"
+python test_meeting_pipeline.py --files downloads/raleigh_*.mp3 --jurisdiction "Raleigh" --date "2024-12-10" --backend faster-whisper
 """
 
 import asyncio
-import json
 import argparse
 from pathlib import Path
 import sys
 import os
+from collections import ChainMap
+from functools import lru_cache
+
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # Optional (not available on Windows): falls back to the default asyncio loop
+    uvloop = None
 
 # Add the app directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.services.transcription import MeetingProcessor
+from app.services import analysis_store
+
+TRANSCRIPT_CACHE_DIR = Path(".cache/transcripts")
+
+# Shown for project fields the analysis left out
+PROJECT_DEFAULTS = {
+    'name': 'Unnamed',
+    'address': 'TBD',
+    'developer': 'Unknown',
+    'current_status': 'Unknown',
+    'vote_outcome': None
+}
+
+def transcript_cache_path(file_path: Path, model: str) -> Path:
+    """
+    Cache location for a transcript, keyed by the audio's SHA-256 and the transcription model
+    """
+    # Shared with the service's compressed-audio cache, so each run hashes the audio once
+    from app.services.transcription import file_sha256
+    
+    digest = file_sha256(file_path)
+    return TRANSCRIPT_CACHE_DIR / f"{digest}_{model}.json"
+
+def load_cached_transcript(cache_path: Path):
+    """
+    Return a cached transcript result, or None on a miss
+    """
+    try:
+        return orjson.loads(cache_path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+def store_transcript(cache_path: Path, transcript: str):
+    """
+    Atomically write a transcript result so an interrupted run never leaves a partial entry
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps({"success": True, "transcript": transcript}))
+    os.replace(tmp_path, cache_path)
+
+@lru_cache(maxsize=1)
+def get_processor(backend: str = "openai", chunk_seconds: float = 0, max_concurrent: int = 5, semantic_cache: bool = False, compute_type: str = None):
+    """
+    Configured MeetingProcessor, created once per process so every file shares its clients and model
+    """
+    # Imported lazily: it pulls in the OpenAI SDK, httpx and tiktoken
+    from app.services.transcription import MeetingProcessor
+    
+    # Oversized (or, with chunk_seconds, long) API uploads are split and sent concurrently
+    processor = MeetingProcessor(transcription_backend=backend)
+    processor.transcription_service.local_compute_type = compute_type
+    processor.analysis_service.semantic_cache = semantic_cache
+    if backend == "openai":
+        processor.transcription_service.max_chunk_seconds = chunk_seconds or None
+        processor.transcription_service.max_concurrent_uploads = max_concurrent
+        if chunk_seconds:
+            print(f"✂️ Splitting into ~{chunk_seconds:g}s chunks, {max_concurrent} uploads at a time")
+    return processor
 
-async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date: str, meeting_type: str = "Planning Commission"):
+async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date: str, meeting_type: str = "Planning Commission", **processor_options):
     """
     Test the complete meeting processing pipeline
+
+    processor_options are passed to get_processor, which reuses one processor across calls.
     """
     print(f"🎯 Testing PermitRDU Meeting Pipeline")
     print(f"📁 File: {file_path}")
@@ -34,20 +103,21 @@ async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date:
     print(f"📋 Type: {meeting_type}")
     print("=" * 50)
     
-    # Check if file exists
-    if not Path(file_path).exists():
+    # Check the file exists and get its size with a single stat
+    audio_path = Path(file_path)
+    try:
+        file_stat = audio_path.stat()
+    except FileNotFoundError:
         print(f"❌ Error: File not found - {file_path}")
         return False
     
-    # Check file size
-    file_size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+    file_size_mb = file_stat.st_size / (1024 * 1024)
     print(f"📊 File size: {file_size_mb:.1f} MB")
     
-    if file_size_mb > 25:
-        print("⚠️  Warning: File larger than 25MB - may need chunking")
-    
-    # Initialize the processor
-    processor = MeetingProcessor()
+    # Built only once the inputs are valid, so bad input fails fast
+    processor = get_processor(**processor_options)
+    backend = processor.transcription_service.backend
+    print(f"🎙️ Backend: {backend}")
     
     # Prepare meeting info
     meeting_info = {
@@ -59,14 +129,36 @@ async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date:
     }
     
     print("🤖 Starting AI processing...")
-    print("1️⃣ Transcribing audio with OpenAI Whisper...")
     
     try:
+        # Reuse the transcript from an earlier run on the same audio when there is one
+        def transcript_model(backend_used: str) -> str:
+            return "whisper-1" if backend_used == "openai" else f"faster-whisper-{processor.transcription_service.local_model_size}"
+        
+        cache_path = await asyncio.to_thread(transcript_cache_path, audio_path, transcript_model(backend))
+        cached_transcript = await asyncio.to_thread(load_cached_transcript, cache_path)
+        
+        if cached_transcript:
+            print(f"1️⃣ Using cached transcript: {cache_path}")
+        else:
+            print("1️⃣ Transcribing audio with " + ("OpenAI Whisper..." if backend == "openai" else "local faster-whisper (batched)..."))
+        
+        # Cache the transcript as soon as it exists, so a failed or interrupted analysis
+        # can be retried without paying for transcription again. It is keyed on the backend
+        # that actually ran, which differs from the requested one after an API fallback.
+        async def save_transcript(transcript_result):
+            backend_used = transcript_result.get("backend", backend)
+            if backend_used != backend:
+                print(f"⚠️ {backend} failed ({transcript_result.get('local_error')}); transcribed with the {backend_used} API instead")
+            save_path = await asyncio.to_thread(transcript_cache_path, audio_path, transcript_model(backend_used))
+            await asyncio.to_thread(store_transcript, save_path, transcript_result["transcript"])
+        
         # Process the meeting
-        result = await processor.process_meeting_file(file_path, meeting_info)
+        result = await processor.process_meeting_file(audio_path, meeting_info, transcript_result=cached_transcript, on_transcript=save_transcript)
         
         if not result["success"]:
-            print(f"❌ Processing failed: {result.get('errors')}")
+            errors = [error for error in result["errors"].values() if error]
+            print(f"❌ Processing failed: {'; '.join(errors) or 'no error reported'}")
             return False
         
         print("✅ Transcription completed!")
@@ -92,10 +184,11 @@ async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date:
             if projects:
                 print(f"\n🏗️ Development Projects:")
                 for i, project in enumerate(projects[:3], 1):  # Show first 3
-                    print(f"  {i}. {project.get('name', 'Unnamed')} - {project.get('address', 'TBD')}")
-                    print(f"     Developer: {project.get('developer', 'Unknown')}")
-                    print(f"     Status: {project.get('current_status', 'Unknown')}")
-                    if project.get('vote_outcome'):
+                    project = ChainMap(project, PROJECT_DEFAULTS)
+                    print(f"  {i}. {project['name']} - {project['address']}")
+                    print(f"     Developer: {project['developer']}")
+                    print(f"     Status: {project['current_status']}")
+                    if project['vote_outcome']:
                         print(f"     Vote: {project['vote_outcome']}")
                     print()
             
@@ -107,9 +200,8 @@ async def test_meeting_pipeline(file_path: str, jurisdiction: str, meeting_date:
                 print()
             
             # Save detailed results
-            output_file = f"test_results_{jurisdiction.lower()}_{meeting_date.replace('-', '')}.json"
-            with open(output_file, "w") as f:
-                json.dump(result, f, indent=2)
+            output_file = f"test_results_{jurisdiction.lower()}_{meeting_date.replace('-', '')}_{audio_path.stem}.json"
+            analysis_store.save(output_file, result)
             
             print(f"💾 Detailed results saved to: {output_file}")
             
@@ -149,14 +241,46 @@ def check_environment():
     print("✅ Environment variables configured")
     return True
 
+async def serve(args, processor_options) -> bool:
+    """
+    Process file paths from stdin until EOF, paying import and model load only once
+    """
+    loop = asyncio.get_running_loop()
+    all_succeeded = True
+    for file_path in args.files or []:
+        all_succeeded &= await test_meeting_pipeline(file_path, args.jurisdiction, args.date, args.type, **processor_options)
+    
+    print("📥 Reading file paths from stdin (Ctrl-D to finish)...")
+    while True:
+        file_path = await loop.run_in_executor(None, sys.stdin.readline)
+        if not file_path:
+            break
+        if file_path.strip():
+            all_succeeded &= await test_meeting_pipeline(file_path.strip(), args.jurisdiction, args.date, args.type, **processor_options)
+    return all_succeeded
+
 async def main():
     parser = argparse.ArgumentParser(description="Test PermitRDU meeting analysis pipeline")
-    parser.add_argument("--file", required=True, help="Path to meeting audio/video file")
+    parser.add_argument("--file", "--files", dest="files", nargs="+", help="Path(s) to meeting audio/video files")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay running and process file paths read from stdin, one per line, with the same processor")
     parser.add_argument("--jurisdiction", required=True, help="Meeting jurisdiction (Raleigh, Durham, etc.)")
     parser.add_argument("--date", required=True, help="Meeting date (YYYY-MM-DD)")
     parser.add_argument("--type", default="Planning Commission", help="Meeting type")
+    parser.add_argument("--backend", choices=["openai", "faster-whisper"], default="openai",
+                        help="Transcription backend: OpenAI Whisper API or local batched faster-whisper")
+    parser.add_argument("--chunk-seconds", type=float, default=0,
+                        help="Also split audio into chunks of about this length for concurrent Whisper uploads (default 0: only split files over 25MB)")
+    parser.add_argument("--max-concurrent", type=int, default=5, help="Maximum concurrent Whisper uploads")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Reuse the analysis of a previously seen transcript with embedding similarity >= 0.9")
+    parser.add_argument("--parallel-files", type=int, default=2, help="Files processed at once when several are given")
+    parser.add_argument("--compute-type", default=None,
+                        help="faster-whisper quantization, e.g. int8, int8_float16, float16 (default: int8_float16 on GPU, int8 on CPU)")
     
     args = parser.parse_args()
+    if not args.files and not args.serve:
+        parser.error("--file is required unless --serve is given")
     
     print("🚀 PermitRDU Meeting Pipeline Test")
     print("=" * 40)
@@ -165,13 +289,31 @@ async def main():
     if not check_environment():
         return
     
+    processor_options = {
+        "backend": args.backend,
+        "chunk_seconds": args.chunk_seconds,
+        "max_concurrent": args.max_concurrent,
+        "semantic_cache": args.semantic_cache,
+        "compute_type": args.compute_type
+    }
+    
     # Run the test
-    success = await test_meeting_pipeline(
-        args.file,
-        args.jurisdiction,
-        args.date,
-        args.type
-    )
+    if args.serve:
+        success = await serve(args, processor_options)
+    elif len(args.files) == 1:
+        success = await test_meeting_pipeline(args.files[0], args.jurisdiction, args.date, args.type, **processor_options)
+    else:
+        # get_processor is cached, so the batch shares one set of clients and any local model
+        semaphore = asyncio.Semaphore(args.parallel_files)
+        
+        async def run_file(file_path: str):
+            async with semaphore:
+                return await test_meeting_pipeline(file_path, args.jurisdiction, args.date, args.type, **processor_options)
+        
+        results = await asyncio.gather(*[run_file(file_path) for file_path in args.files], return_exceptions=True)
+        succeeded = sum(result is True for result in results)
+        print(f"\n📦 Batch: {succeeded}/{len(results)} files processed successfully")
+        success = succeeded == len(results)
     
     if success:
         print("\n🎉 Pipeline test completed successfully!")
@@ -181,4 +323,5 @@ async def main():
         print("🔧 Check error messages above and try again")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # libuv's loop schedules the many concurrent chunk uploads and to_thread calls with less overhead
+    (uvloop.run if uvloop else asyncio.run)(main())
\ No newline at end of file
@@ -1,56 +1,93 @@
-import json
+import sys
+from collections import ChainMap
+from operator import itemgetter
 
-# Load and display the analysis results
-with open('analysis_raleigh_20250812_145741.json', 'r') as f:
-    data = json.load(f)
+from app.services import analysis_store
 
-print('🏗️ TRIANGLE DEVELOPMENT INTELLIGENCE EXTRACTED')
-print('=' * 60)
+# Project fields in display order, with the text shown when a field is missing
+PROJECT_DEFAULTS = {
+    'name': 'Unknown',
+    'address': 'TBD',
+    'case_number': 'N/A',
+    'project_type': 'Unknown',
+    'current_status': 'Unknown',
+    'vote_outcome': 'No vote',
+    'vote_details': '',
+    'acreage': 'Not specified',
+    'developer': 'Unknown',
+    'staff_recommendation': 'Not specified',
+    'previous_action': 'None noted'
+}
+project_fields = itemgetter(*PROJECT_DEFAULTS)
 
-# Meeting Info
-meeting = data.get('meeting_info', {})
-print(f"📅 Meeting: {meeting.get('jurisdiction')} {meeting.get('type')}")
-print(f"📆 Date: {meeting.get('date')}")
-print()
+PROJECT_TEMPLATE = """
+📍 PROJECT {0}:
+   Name: {1}
+   Address: {2}
+   Case Number: {3}
+   Type: {4}
+   Status: {5}
+   Vote: {6} ({7})
+   Size: {8}
+   Developer: {9}
+   Staff Rec: {10}
+   History: {11}"""
 
-# Projects
+# Load and display the analysis results (plain .json or compressed .json.zst),
+# reading only the sections shown below rather than the whole file
+data = analysis_store.load_fields(
+    'analysis_raleigh_20250812_145741.json',
+    'meeting_info',
+    'analysis.projects',
+    'analysis.key_people',
+    'analysis.newsletter_highlights'
+)
+
+meeting = data.get('meeting_info', {})
 analysis = data.get('analysis', {})
 projects = analysis.get('projects', [])
+people = analysis.get('key_people', [])
+highlights = analysis.get('newsletter_highlights', [])
+
+# Collect every line and write the report in one go
+out = []
+line = out.append
 
+line('🏗️ TRIANGLE DEVELOPMENT INTELLIGENCE EXTRACTED')
+line('=' * 60)
+
+# Meeting Info
+line(f"📅 Meeting: {meeting.get('jurisdiction')} {meeting.get('type')}")
+line(f"📆 Date: {meeting.get('date')}")
+line('')
+
+# Projects
 if projects:
-    print(f"🏗️ DEVELOPMENT PROJECTS FOUND: {len(projects)}")
-    print('=' * 60)
+    line(f"🏗️ DEVELOPMENT PROJECTS FOUND: {len(projects)}")
+    line('=' * 60)
     
     for i, project in enumerate(projects, 1):
-        print(f"\n📍 PROJECT {i}:")
-        print(f"   Name: {project.get('name', 'Unknown')}")
-        print(f"   Address: {project.get('address', 'TBD')}")
-        print(f"   Case Number: {project.get('case_number', 'N/A')}")
-        print(f"   Type: {project.get('project_type', 'Unknown')}")
-        print(f"   Status: {project.get('current_status', 'Unknown')}")
-        print(f"   Vote: {project.get('vote_outcome', 'No vote')} ({project.get('vote_details', '')})")
-        print(f"   Size: {project.get('acreage', 'Not specified')}")
-        print(f"   Developer: {project.get('developer', 'Unknown')}")
-        print(f"   Staff Rec: {project.get('staff_recommendation', 'Not specified')}")
-        print(f"   History: {project.get('previous_action', 'None noted')}")
+        line(PROJECT_TEMPLATE.format(i, *project_fields(ChainMap(project, PROJECT_DEFAULTS))))
 
 # Key People
-people = analysis.get('key_people', [])
 if people:
-    print(f"\n👥 KEY PEOPLE ({len(people)}):")
-    print('=' * 40)
+    line(f"\n👥 KEY PEOPLE ({len(people)}):")
+    line('=' * 40)
     for person in people:
-        print(f"   • {person.get('name')} ({person.get('role')})")
+        line(f"   • {person.get('name')} ({person.get('role')})")
         if person.get('notable_positions'):
-            print(f"     Position: {person.get('notable_positions')}")
+            line(f"     Position: {person.get('notable_positions')}")
 
 # Newsletter Highlights
-highlights = analysis.get('newsletter_highlights', [])
 if highlights:
-    print(f"\n💡 NEWSLETTER HIGHLIGHTS:")
-    print('=' * 40)
+    line(f"\n💡 NEWSLETTER HIGHLIGHTS:")
+    line('=' * 40)
     for i, highlight in enumerate(highlights, 1):
-        print(f"   {i}. {highlight}")
+        line(f"   {i}. {highlight}")
+
+line('\n' + '=' * 60)
+line('🎉 Analysis Complete - Ready for Newsletter Generation!')
+line('')
 
-print('\n' + '=' * 60)
-print('🎉 Analysis Complete - Ready for Newsletter Generation!')
\ No newline at end of file
+sys.stdout.buffer.write('\n'.join(out).encode('utf-8'))
+sys.stdout.flush()